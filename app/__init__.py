@@ -1,7 +1,11 @@
 from flask import Flask
 from markupsafe import Markup
 from app.config import BASE_DIR
-import markdown as md
+from app.http_cache import init_compression
+from app.metrics import init_metrics
+from app.timing import init_timing, span
+from app.watcher import init_watcher
+from app.warmup import init_warmup
 import os
 
 
@@ -11,12 +15,19 @@ def create_app():
                 template_folder=os.path.join(BASE_DIR, 'app', 'templates'))
     app.secret_key = 'interview-prep-dev-key'
 
+    init_timing(app)
+    init_metrics(app)
+    init_compression(app)
+    init_watcher(app)
+
     # Jinja2 filter: render markdown inline (backticks, bold, etc.)
     @app.template_filter('md')
     def markdown_filter(text):
         if not text:
             return ''
-        html = md.markdown(text, extensions=['tables', 'fenced_code'])
+        import markdown  # deferred: most requests render none
+        with span('markdown'):
+            html = markdown.markdown(text, extensions=['tables', 'fenced_code'])
         return Markup(html)
 
     # Jinja2 filter: render markdown but strip wrapping <p> for inline use
@@ -24,7 +35,9 @@ def create_app():
     def markdown_inline_filter(text):
         if not text:
             return ''
-        html = md.markdown(text, extensions=['fenced_code'])
+        import markdown
+        with span('markdown'):
+            html = markdown.markdown(text, extensions=['fenced_code'])
         # Strip outer <p></p> wrapper for inline contexts
         html = html.strip()
         if html.startswith('<p>') and html.endswith('</p>'):
@@ -69,4 +82,6 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(practice_bp)
 
+    init_warmup(app)
+
     return app
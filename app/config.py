@@ -18,12 +18,69 @@ CATEGORY_COLORS = {
     'terminology': '#8B5CF6',
 }
 
-CATEGORY_EMOJI = {
-    '🔷': 'sql',
-    '🔶': 'python',
-    '🟢': 'stats',
-    '🟠': 'ml',
-    '🟣': 'terminology',
+SM2_INTERVALS = [1, 3, 7, 14, 30]
+
+# Response compression: gzip text/html and JSON bodies at least this many bytes
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+COMPRESS_MIMETYPES = {'text/html', 'application/json'}
+
+# Per-request timing (app/timing.py): a Server-Timing header with the time
+# spent in storage, search, markdown, templates, progress flushes and SQL
+# runs; REQUEST_LOG also logs one JSON line per request to stderr
+SERVER_TIMING = True
+REQUEST_LOG = os.environ.get('REQUEST_LOG', '').lower() in ('1', 'true', 'yes')
+
+# Prometheus metrics at /metrics (app/metrics.py). Under gunicorn, set
+# METRICS_DIR to a directory all workers share (emptied on each deploy);
+# each worker writes its totals there at most every METRICS_SYNC_INTERVAL
+# seconds and a scrape of any worker sums them
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_SYNC_INTERVAL = 1.0
+
+# Store caches (app/storage/cache.py): the most entries and approximate bytes
+# (data file sizes) each store keeps in memory, least recently used evicted
+# first; None for no limit
+STORE_CACHE_LIMITS = {
+    'modules': {'max_entries': None, 'max_bytes': 32 * 1024 * 1024},
+    'questions': {'max_entries': None, 'max_bytes': 32 * 1024 * 1024},
+    'challenges': {'max_entries': None, 'max_bytes': 8 * 1024 * 1024},
+    'challenge_data': {'max_entries': None, 'max_bytes': 64 * 1024 * 1024},
 }
 
-SM2_INTERVALS = [1, 3, 7, 14, 30]
+# /practice/sql-run results, keyed by challenge content and normalized SQL
+# (app/sql_runner.py); bytes are the results' approximate JSON size
+SQL_RESULT_CACHE = {'max_entries': 5000, 'max_bytes': 32 * 1024 * 1024}
+
+# Threads per worker that check submissions against challenges' hidden
+# test_cases datasets
+SQL_CASE_WORKERS = 4
+
+# Server-side quiz sessions: idle seconds before a session expires, and the
+# most sessions a worker keeps (oldest are evicted first)
+QUIZ_SESSION_TTL = 2 * 60 * 60
+QUIZ_SESSION_MAX = 2000
+
+# Practice browser: items per page / infinite-scroll batch
+PRACTICE_PAGE_SIZE = 20
+
+# Admin import: sections shown in the parse preview (the rest are only counted)
+ADMIN_PREVIEW_SECTIONS = 20
+
+# Admin imports run as background jobs: worker threads per process, and how
+# many finished jobs stay around for status polling
+INGEST_JOB_WORKERS = 1
+INGEST_JOBS_KEPT = 20
+
+# Watch mode: app workers re-ingest changed modules/*.md and reload changed
+# data files into their caches, checking every WATCH_INTERVAL seconds
+WATCH_MODULES = os.environ.get('WATCH_MODULES', '').lower() in ('1', 'true', 'yes')
+WATCH_INTERVAL = 1.0
+
+# Load all content, build indexes and compile templates in create_app,
+# before serving (see app/warmup.py); set WARM_CACHES=0 to fill lazily
+WARM_CACHES = os.environ.get('WARM_CACHES', '1').lower() in ('1', 'true', 'yes')
+
+# Written by scripts/ingest_all.py: source file hashes and what the last run changed
+INGEST_MANIFEST_FILE = os.path.join(DATA_DIR, 'ingest-manifest.json')
@@ -0,0 +1,96 @@
+"""
+Response compression and conditional GET support.
+
+- init_compression(app): gzip text/html and JSON responses above
+  COMPRESS_MIN_SIZE when the client accepts it.
+- etag_cached(version_func): view decorator that derives a strong ETag from
+  content/progress version tokens and answers a matching If-None-Match with
+  304 before the view renders anything.
+"""
+
+import gzip
+import hashlib
+from functools import wraps
+from flask import request, session, make_response
+from app.config import COMPRESS_MIN_SIZE, COMPRESS_LEVEL, COMPRESS_MIMETYPES
+
+# Appended to the ETag of gzipped bodies so each encoding gets its own tag
+GZIP_SUFFIX = '-gz'
+
+
+def init_compression(app):
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESS_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or not request.accept_encodings['gzip']):
+            return response
+
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + GZIP_SUFFIX, weak)
+        return response
+
+
+def content_etag(*versions):
+    """Strong ETag for a page built from the given version tokens.
+
+    Returns None when the page must not be cached: a version is missing (the
+    view will 404) or flash messages are pending, since base.html renders
+    them into the page.
+    """
+    if any(v is None for v in versions) or '_flashes' in session:
+        return None
+    return hashlib.sha1('|'.join(versions).encode('utf-8')).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """Return a 304 response if If-None-Match matches etag, else None."""
+    if etag is None:
+        return None
+    tags = [etag]
+    if request.accept_encodings['gzip']:
+        tags.append(etag + GZIP_SUFFIX)
+    for tag in tags:
+        if request.if_none_match.contains(tag):
+            response = make_response('', 304)
+            response.set_etag(tag)
+            response.cache_control.no_cache = True
+            return response
+    return None
+
+
+def with_etag(rv, etag):
+    response = make_response(rv)
+    if etag is not None:
+        response.set_etag(etag)
+        # Let browsers keep the page but revalidate it on every visit
+        response.cache_control.no_cache = True
+    return response
+
+
+def etag_cached(version_func):
+    """Decorate a view whose output depends only on version_func(**view_args).
+
+    version_func returns a tuple of version tokens (None for a missing one).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            etag = content_etag(*version_func(**kwargs))
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            return with_etag(view(**kwargs), etag)
+        return wrapper
+    return decorator
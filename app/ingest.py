@@ -0,0 +1,207 @@
+"""
+Incremental ingest of modules/*.md into data/modules and data/questions.
+
+Each source file is hashed and compared with data/ingest-manifest.json;
+unchanged files are skipped unless the parser itself changed or force is
+given. The manifest records every file's hash and what the run changed.
+
+Used by scripts/ingest_all.py and by the watcher (app/watcher.py). Runs
+take an exclusive lock on the manifest, so several processes watching the
+same tree never write the same outputs at once; whoever comes second finds
+the hashes already up to date.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from app.config import BASE_DIR, MODULES_DIR, DATA_MODULES_DIR, DATA_QUESTIONS_DIR, INGEST_MANIFEST_FILE
+from app.parser.module_parser import parse_module_file
+from app.parser.question_extractor import extract_questions
+from app.storage.module_store import save_module
+from app.storage.question_store import save_questions
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are not serialized
+    fcntl = None
+
+# Output depends on these as much as on the markdown itself
+PARSER_SOURCES = [
+    'app/parser/module_parser.py',
+    'app/parser/classifier.py',
+    'app/parser/keywords.py',
+    'app/parser/question_extractor.py',
+    'app/models/module.py',
+    'app/models/question.py',
+]
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parser_fingerprint():
+    h = hashlib.sha256()
+    for rel in PARSER_SOURCES:
+        with open(os.path.join(BASE_DIR, rel), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_manifest():
+    if not os.path.exists(INGEST_MANIFEST_FILE):
+        return {}
+    with open(INGEST_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def outputs_exist(module_id):
+    return (os.path.exists(os.path.join(DATA_MODULES_DIR, f'{module_id}.json'))
+            and os.path.exists(os.path.join(DATA_QUESTIONS_DIR, f'{module_id}.json')))
+
+
+def remove_outputs(module_id):
+    for directory in (DATA_MODULES_DIR, DATA_QUESTIONS_DIR):
+        path = os.path.join(directory, f'{module_id}.json')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def parse_file(filepath):
+    """Parse and extract one markdown file. Runs in pool workers with jobs > 1."""
+    start = time.perf_counter()
+    module = parse_module_file(filepath)
+    questions = extract_questions(module)
+    return module, questions, time.perf_counter() - start
+
+
+def write_outputs(filename, module, questions, parse_secs, log=print):
+    start = time.perf_counter()
+    save_module(module)
+    save_questions(module.id, questions)
+    write_secs = time.perf_counter() - start
+
+    log(f'\nParsed {filename} ({parse_secs * 1000:.1f} ms parse, {write_secs * 1000:.1f} ms write)')
+    log(f'  Module {module.number:02d}: "{module.title}"')
+    log(f'  Sections: {len(module.sections)}')
+    log(f'  Questions extracted: {len(questions)}')
+
+    # Show question type breakdown
+    type_counts = {}
+    for q in questions:
+        type_counts[q.question_type] = type_counts.get(q.question_type, 0) + 1
+    if type_counts:
+        types_str = ', '.join(f'{t}: {c}' for t, c in sorted(type_counts.items()))
+        log(f'  Types: {types_str}')
+
+
+def parse_all(filepaths, jobs):
+    """Yield (module, questions, seconds) for each file, in input order."""
+    if jobs <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            yield parse_file(filepath)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(parse_file, filepaths)
+
+
+@contextmanager
+def manifest_lock():
+    os.makedirs(os.path.dirname(INGEST_MANIFEST_FILE), exist_ok=True)
+    with open(INGEST_MANIFEST_FILE + '.lock', 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def source_files():
+    return sorted(glob.glob(os.path.join(MODULES_DIR, '*.md')))
+
+
+def run_ingest(force=False, jobs=1, log=print):
+    """Re-parse new and changed source files; returns the manifest's changes.
+
+    Raises FileNotFoundError if MODULES_DIR has no markdown files.
+    """
+    with manifest_lock():
+        return _run_ingest(force, jobs, log)
+
+
+def _run_ingest(force, jobs, log):
+    md_files = source_files()
+    if not md_files:
+        raise FileNotFoundError(f'No markdown files found in {MODULES_DIR}')
+
+    previous = load_manifest()
+    fingerprint = parser_fingerprint()
+    parser_changed = previous.get('parser') != fingerprint
+    if parser_changed and previous:
+        log('Parser changed since last ingest; re-parsing everything')
+
+    files = {}
+    changes = {'added': [], 'changed': [], 'unchanged': [], 'removed': []}
+    to_parse = []
+    started = time.perf_counter()
+
+    for filepath in md_files:
+        filename = os.path.basename(filepath)
+        digest = file_sha256(filepath)
+        old = previous.get('files', {}).get(filename)
+
+        if (not force and not parser_changed and old
+                and old['sha256'] == digest and outputs_exist(old['module_id'])):
+            log(f'Skipping {filename} (unchanged)')
+            files[filename] = old
+            changes['unchanged'].append(filename)
+        else:
+            to_parse.append((filepath, digest, old))
+
+    results = parse_all([filepath for filepath, _, _ in to_parse], jobs)
+    for (filepath, digest, old), (module, questions, parse_secs) in zip(to_parse, results):
+        filename = os.path.basename(filepath)
+        write_outputs(filename, module, questions, parse_secs, log)
+        files[filename] = {
+            'sha256': digest,
+            'module_id': module.id,
+            'sections': len(module.sections),
+            'questions': len(questions),
+        }
+        changes['changed' if old else 'added'].append(filename)
+
+    # Keep the manifest in source order regardless of what was skipped
+    files = {os.path.basename(fp): files[os.path.basename(fp)] for fp in md_files}
+    total_sections = sum(entry['sections'] for entry in files.values())
+    total_questions = sum(entry['questions'] for entry in files.values())
+
+    live_modules = {entry['module_id'] for entry in files.values()}
+    for filename, entry in previous.get('files', {}).items():
+        if filename not in files:
+            changes['removed'].append(filename)
+            if entry['module_id'] not in live_modules:
+                remove_outputs(entry['module_id'])
+
+    manifest = {
+        'parser': fingerprint,
+        'files': files,
+        'changes': changes,
+    }
+    tmp = INGEST_MANIFEST_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp, INGEST_MANIFEST_FILE)
+
+    log(f'\n{"="*50}')
+    log(f'Total: {len(md_files)} modules, {total_sections} sections, {total_questions} questions')
+    log(f'Parsed {len(changes["added"]) + len(changes["changed"])}, '
+        f'skipped {len(changes["unchanged"])}, removed {len(changes["removed"])} '
+        f'in {time.perf_counter() - started:.2f}s')
+    return changes
@@ -0,0 +1,290 @@
+"""
+Prometheus metrics at /metrics, in the text exposition format.
+
+Counters and histograms live in module-level registries and are updated in
+place (route latency per blueprint and endpoint, sql_runner time by outcome,
+progress flushes, store cache hits and misses); gauges are read from a
+callback at scrape time (store cache sizes).
+
+Gunicorn runs several worker processes and a scrape reaches only one of
+them. With METRICS_DIR set, each worker writes its values to
+METRICS_DIR/metrics-<pid>.json after a request, at most every
+METRICS_SYNC_INTERVAL seconds (and on exit), and a scrape sums counters and
+histograms over every file. Gauges are reported per live worker with a pid
+label. Empty the directory on each deploy, as with prometheus_client's
+multiprocess mode.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+from app.config import METRICS_ENABLED, METRICS_DIR, METRICS_SYNC_INTERVAL
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+FLUSH_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+_lock = threading.Lock()
+_registry = {}  # name -> metric, in registration order
+_last_sync = 0.0
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # tuple of label values -> value
+        _registry[name] = self
+
+    @property
+    def sample_name(self):
+        """Name used in HELP/TYPE lines."""
+        return self.name
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    @property
+    def sample_name(self):
+        return f'{self.name}_total'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self, values: dict):
+        for key, value in values.items():
+            yield self.sample_name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    """Values are [count per bucket..., count above the last bucket, sum]."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def samples(self, values: dict):
+        for key, counts in values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                yield f'{self.name}_bucket', {**labels, 'le': str(bound)}, cumulative
+            yield f'{self.name}_sum', labels, counts[-1]
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Gauge(Metric):
+    """Gauge read from collect(), which returns {label values tuple: value}."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames=(), collect=None):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def samples(self, values: dict):
+        labelnames = self.labelnames + ('pid',) if METRICS_DIR else self.labelnames
+        for key, value in values.items():
+            yield self.name, dict(zip(labelnames, key)), value
+
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Request latency by blueprint and endpoint.',
+    ['blueprint', 'endpoint', 'method'])
+REQUESTS = Counter(
+    'http_requests', 'Responses by blueprint and status code.', ['blueprint', 'status'])
+SQL_SECONDS = Histogram(
+    'sql_runner_duration_seconds',
+    'execute_and_compare time by outcome (correct, incorrect, timeout, error).',
+    ['outcome'], buckets=SQL_BUCKETS)
+FLUSH_SECONDS = Histogram(
+    'progress_flush_duration_seconds', 'Time to write progress.json.', buckets=FLUSH_BUCKETS)
+CACHE_HITS = Counter('store_cache_hits', 'Store lookups served from the cache.', ['store'])
+CACHE_MISSES = Counter('store_cache_misses', 'Store lookups that read the disk.', ['store'])
+CACHE_EVICTIONS = Counter('store_cache_evictions', 'Entries evicted to keep a store cache in bounds.',
+                          ['store'])
+
+
+def _cache_stats(field: str) -> dict:
+    from app.storage import cache
+    # Imported only so their caches exist and report zeros before first use
+    from app.storage import module_store, question_store, challenge_store  # noqa: F401
+    return {(name,): s[field] for name, s in cache.stats().items()}
+
+
+CACHE_ENTRIES = Gauge('store_cache_entries', 'Entries held in each store cache.', ['store'],
+                      collect=lambda: _cache_stats('entries'))
+CACHE_BYTES = Gauge('store_cache_bytes', 'Approximate size of each store cache (data file bytes).',
+                    ['store'], collect=lambda: _cache_stats('bytes'))
+
+
+def _reset_after_fork():
+    # Anything counted in a preloading master would otherwise be counted
+    # again by every worker forked from it
+    global _lock
+    _lock = threading.Lock()
+    for metric in _registry.values():
+        metric.values.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _snapshot() -> dict:
+    """This process's values, gauges collected now."""
+    with _lock:
+        snapshot = {name: {key: list(v) if isinstance(v, list) else v for key, v in metric.values.items()}
+                    for name, metric in _registry.items() if metric.kind != 'gauge'}
+    for name, metric in _registry.items():
+        if metric.kind == 'gauge':
+            snapshot[name] = metric.collect()
+    return snapshot
+
+
+def _sync_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f'metrics-{pid}.json')
+
+
+def sync():
+    """Write this process's values to METRICS_DIR."""
+    global _last_sync
+    _last_sync = time.monotonic()
+    pid = os.getpid()
+    data = {name: [[list(key), value] for key, value in values.items()]
+            for name, values in _snapshot().items()}
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _sync_path(pid)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(into: dict, name: str, key: tuple, value):
+    values = into.setdefault(name, {})
+    old = values.get(key)
+    if old is None:
+        values[key] = value
+    elif isinstance(value, list):
+        values[key] = [a + b for a, b in zip(old, value)]
+    else:
+        values[key] = old + value
+
+
+def _aggregate() -> dict:
+    """Values summed over every worker's file; gauges keyed by pid too."""
+    sync()
+    merged = {}
+    for path in glob.glob(os.path.join(METRICS_DIR, 'metrics-*.json')):
+        pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        live = None
+        for name, entries in data.items():
+            metric = _registry.get(name)
+            if metric is None:
+                continue
+            if metric.kind == 'gauge':
+                if live is None:
+                    live = _pid_alive(pid)
+                if not live:
+                    continue
+                for key, value in entries:
+                    merged.setdefault(name, {})[tuple(key) + (str(pid),)] = value
+            else:
+                for key, value in entries:
+                    _merge(merged, name, tuple(key), value)
+    return merged
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{k}="' + str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') + '"'
+               for k, v in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    values = _aggregate() if METRICS_DIR else _snapshot()
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f'# HELP {metric.sample_name} {metric.help}')
+        lines.append(f'# TYPE {metric.sample_name} {metric.kind}')
+        for sample, labels, value in metric.samples(values.get(name, {})):
+            lines.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def start_clock():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            blueprint = request.blueprint or 'app'
+            REQUEST_SECONDS.observe(time.perf_counter() - start, blueprint=blueprint,
+                                    endpoint=request.endpoint or 'none', method=request.method)
+            REQUESTS.inc(blueprint=blueprint, status=response.status_code)
+        if METRICS_DIR and time.monotonic() - _last_sync >= METRICS_SYNC_INTERVAL:
+            sync()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    if METRICS_DIR:
+        atexit.register(sync)
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ChallengeCase:
+    """One hidden dataset a SQL challenge is also checked against."""
+    name: str
+    setup_sql: str  # the case's sql_setup, or the challenge's
+    tables: list  # TableData loaded after setup_sql
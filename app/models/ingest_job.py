@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+JOB_STATUSES = ['queued', 'running', 'done', 'failed', 'cancelled']
+
+
+@dataclass(slots=True)
+class IngestJob:
+    id: str
+    action: str  # 'preview' or 'save'
+    title: str
+    path: str  # spooled markdown source, shared by a preview and the save made from it
+    filename: str = ''  # uploaded file name, '' for pasted content
+    size: int = 0  # bytes in path
+    status: str = 'queued'
+    position: int = 0  # bytes of path parsed so far
+    sections: int = 0
+    questions: int = 0
+    module_id: str = ''
+    preview: dict = None  # set by a finished preview job
+    error: str = ''
+    cancel_requested: bool = False
+    created_at: float = 0.0  # time.time()
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    @property
+    def progress_pct(self):
+        if self.status == 'done':
+            return 100
+        if not self.size:
+            return 0
+        return min(99, int(self.position * 100 / self.size))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'action': self.action,
+            'title': self.title,
+            'filename': self.filename,
+            'status': self.status,
+            'progress_pct': self.progress_pct,
+            'size': self.size,
+            'position': self.position,
+            'sections': self.sections,
+            'questions': self.questions,
+            'module_id': self.module_id,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Optional
 from datetime import datetime, timedelta
 from app.config import SM2_INTERVALS
@@ -7,6 +7,8 @@ from app.config import SM2_INTERVALS
 @dataclass
 class QuestionProgress:
     question_id: str
+    module_id: str = ''
+    category: str = ''
     status: str = 'unseen'  # unseen, attempted, correct, needs_review
     attempts: int = 0
     streak: int = 0
@@ -39,6 +41,8 @@ class QuestionProgress:
     def to_dict(self):
         return {
             'question_id': self.question_id,
+            'module_id': self.module_id,
+            'category': self.category,
             'status': self.status,
             'attempts': self.attempts,
             'streak': self.streak,
@@ -70,7 +74,7 @@ class ModuleProgress:
         return {
             'module_id': self.module_id,
             'status': self.status,
-            'sections_viewed': self.sections_viewed,
+            'sections_viewed': list(self.sections_viewed),
             'total_sections': self.total_sections,
         }
 
@@ -79,6 +83,44 @@ class ModuleProgress:
         return cls(**d)
 
 
+@dataclass
+class ProgressCounts:
+    """Running totals over a group of QuestionProgress entries.
+
+    Due counts depend on today's date, so next_review dates are kept as a
+    date -> count histogram instead of a single counter.
+    """
+    attempted: int = 0
+    correct: int = 0
+    needs_review: int = 0
+    review_dates: dict = field(default_factory=dict)
+
+    def add(self, qp: QuestionProgress, sign: int = 1):
+        if qp.attempts > 0:
+            self.attempted += sign
+        if qp.status == 'correct':
+            self.correct += sign
+        elif qp.status == 'needs_review':
+            self.needs_review += sign
+        if qp.next_review:
+            n = self.review_dates.get(qp.next_review, 0) + sign
+            if n:
+                self.review_dates[qp.next_review] = n
+            else:
+                del self.review_dates[qp.next_review]
+
+    def due(self, today: str) -> int:
+        return sum(n for day, n in self.review_dates.items() if day <= today)
+
+    def summary(self, today: str) -> dict:
+        return {
+            'attempted': self.attempted,
+            'correct': self.correct,
+            'needs_review': self.needs_review,
+            'due': self.due(today),
+        }
+
+
 @dataclass
 class UserProgress:
     modules: dict = field(default_factory=dict)  # module_id -> ModuleProgress
@@ -86,6 +128,9 @@ class UserProgress:
     daily_streak: int = 0
     last_study_date: Optional[str] = None  # ISO date
     study_history: list = field(default_factory=list)  # list of ISO dates
+    # Derived from questions, never serialized
+    module_stats: dict = field(default_factory=dict, repr=False)  # module_id -> ProgressCounts
+    category_stats: dict = field(default_factory=dict, repr=False)  # category -> ProgressCounts
 
     def get_module_progress(self, module_id: str) -> ModuleProgress:
         if module_id not in self.modules:
@@ -99,6 +144,57 @@ class UserProgress:
             self.questions[question_id] = QuestionProgress(question_id=question_id)
         return self.questions[question_id]
 
+    def record_attempt(self, question_id: str, grade: str,
+                       module_id: str = '', category: str = '') -> QuestionProgress:
+        """Grade a question and keep the module/category counters in step.
+
+        The entry is replaced rather than changed in place, so a snapshot()
+        holding the old one still sees the state it was taken from.
+        """
+        old = self.questions.get(question_id)
+        if old is not None:
+            self._count(old, -1)
+            qp = replace(old)
+        else:
+            qp = QuestionProgress(question_id=question_id)
+        if module_id:
+            qp.module_id = module_id
+        if category:
+            qp.category = category
+        qp.record_attempt(grade)
+        self.questions[question_id] = qp
+        self._count(qp, 1)
+        return qp
+
+    def remove_question(self, question_id: str):
+        qp = self.questions.pop(question_id, None)
+        if qp is not None:
+            self._count(qp, -1)
+
+    def _count(self, qp: QuestionProgress, sign: int):
+        for stats, key in ((self.module_stats, qp.module_id), (self.category_stats, qp.category)):
+            if key not in stats:
+                stats[key] = ProgressCounts()
+            stats[key].add(qp, sign)
+
+    def rebuild_stats(self):
+        self.module_stats = {}
+        self.category_stats = {}
+        for qp in self.questions.values():
+            self._count(qp, 1)
+
+    def module_summary(self, module_id: str) -> dict:
+        counts = self.module_stats.get(module_id) or ProgressCounts()
+        return counts.summary(datetime.now().strftime('%Y-%m-%d'))
+
+    def category_summaries(self) -> dict:
+        today = datetime.now().strftime('%Y-%m-%d')
+        return {cat: c.summary(today) for cat, c in self.category_stats.items() if cat}
+
+    def module_summaries(self) -> dict:
+        today = datetime.now().strftime('%Y-%m-%d')
+        return {mid: c.summary(today) for mid, c in self.module_stats.items() if mid}
+
     def update_streak(self):
         today = datetime.now().strftime('%Y-%m-%d')
         if self.last_study_date == today:
@@ -120,13 +216,17 @@ class UserProgress:
                 due.append(qp.question_id)
         return due
 
+    def due_count(self) -> int:
+        today = datetime.now().strftime('%Y-%m-%d')
+        return sum(c.due(today) for c in self.module_stats.values())
+
     @property
     def total_attempted(self):
-        return sum(1 for q in self.questions.values() if q.attempts > 0)
+        return sum(c.attempted for c in self.module_stats.values())
 
     @property
     def total_correct(self):
-        return sum(1 for q in self.questions.values() if q.status == 'correct')
+        return sum(c.correct for c in self.module_stats.values())
 
     def to_dict(self):
         return {
@@ -137,6 +237,25 @@ class UserProgress:
             'study_history': self.study_history,
         }
 
+    def snapshot(self) -> dict:
+        """Point-in-time copy to serialize once the caller drops its lock.
+
+        Question entries are shared rather than copied: record_attempt
+        replaces them instead of mutating them. snapshot_dict() turns the
+        result into to_dict() form.
+        """
+        return {
+            'modules': {k: v.to_dict() for k, v in self.modules.items()},
+            'questions': dict(self.questions),
+            'daily_streak': self.daily_streak,
+            'last_study_date': self.last_study_date,
+            'study_history': list(self.study_history),
+        }
+
+    @staticmethod
+    def snapshot_dict(snapshot: dict) -> dict:
+        return dict(snapshot, questions={k: v.to_dict() for k, v in snapshot['questions'].items()})
+
     @classmethod
     def from_dict(cls, d):
         up = cls()
@@ -145,4 +264,5 @@ class UserProgress:
         up.daily_streak = d.get('daily_streak', 0)
         up.last_study_date = d.get('last_study_date')
         up.study_history = d.get('study_history', [])
+        up.rebuild_stats()
         return up
@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from typing import Optional
-import uuid
+import hashlib
 
 
 QUESTION_TYPES = [
@@ -31,7 +31,9 @@ class Question:
     @classmethod
     def create(cls, **kwargs):
         if 'id' not in kwargs:
-            kwargs['id'] = str(uuid.uuid4())[:8]
+            kwargs['id'] = make_question_id(kwargs.get('module_id', ''),
+                                            kwargs.get('section_title', ''),
+                                            kwargs.get('prompt', ''))
         return cls(**kwargs)
 
     def to_dict(self):
@@ -71,3 +73,27 @@ class Question:
             rubric=d.get('rubric', []),
             source=d.get('source', 'auto'),
         )
+
+
+def make_question_id(module_id: str, section_title: str, prompt: str) -> str:
+    """Deterministic id from content, so re-ingesting keeps progress attached."""
+    key = '\x1f'.join((module_id, section_title, prompt))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+
+def dedupe_id(question, seen: set):
+    """Suffix question's id until it isn't in seen, then add it to seen."""
+    base, n = question.id, 1
+    while question.id in seen:
+        n += 1
+        question.id = f'{base}-{n}'
+    seen.add(question.id)
+    return question
+
+
+def dedupe_ids(questions: list, taken=()) -> list:
+    """Suffix ids that repeat (identical prompts in one section) or clash with taken."""
+    seen = set(taken)
+    for q in questions:
+        dedupe_id(q, seen)
+    return questions
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class QuizSession:
+    token: str
+    question_ids: tuple  # ordered question ids for this run
+    module_id: str = ''  # '' for review / random sessions
+    categories: tuple = ()
+    types: tuple = ()
+    cursor: int = 0  # furthest question index reached
+    started_at: float = 0.0  # time.time()
+    touched_at: float = 0.0
+
+    @property
+    def total(self):
+        return len(self.question_ids)
+
+    def question_id_at(self, idx: int):
+        if 0 <= idx < len(self.question_ids):
+            return self.question_ids[idx]
+        return None
@@ -0,0 +1,98 @@
+"""
+Keyword classifier shared by the module and master-doc parsers.
+
+All keywords of a classifier are compiled into one regex, factored as a
+prefix trie so the engine does a single scan of the lowercased text no matter
+how many keywords there are. Keywords match case-insensitively and on word
+boundaries wherever they start or end with a word character, with an
+optional plural 's' (so 'model' matches 'models' but not 'remodel').
+Matches don't overlap: where keywords nest ('regression' in 'logistic
+regression') only the longest counts.
+"""
+
+import re
+
+
+class KeywordClassifier:
+    """Classify text by the keywords it contains.
+
+    rules is a sequence of (category, keywords) pairs, where keywords is a
+    {keyword: weight} dict or a list of keywords of weight 1. A category may
+    appear in several rules.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self._keywords = {}  # lowercased keyword -> [(rule index, category, weight)]
+        for index, (category, keywords) in enumerate(rules):
+            if not isinstance(keywords, dict):
+                keywords = dict.fromkeys(keywords, 1.0)
+            self.rules.append((category, keywords))
+            for keyword, weight in keywords.items():
+                self._keywords.setdefault(keyword.lower(), []).append((index, category, weight))
+        self._pattern = _compile(self._keywords) if self._keywords else None
+
+    def matches(self, text: str) -> set:
+        """Distinct keywords (lowercased) found in text."""
+        if self._pattern is None:
+            return set()
+        found = set(self._pattern.findall(text.lower()))
+        # Anything not a keyword as matched is a plural
+        return {kw if kw in self._keywords else kw[:-1] for kw in found}
+
+    def scores(self, text: str) -> dict:
+        """Summed weight of the distinct keywords found, per category."""
+        scores = dict.fromkeys((category for category, _ in self.rules), 0.0)
+        for keyword in self.matches(text):
+            for _, category, weight in self._keywords[keyword]:
+                scores[category] += weight
+        return scores
+
+    def best(self, text: str, default: str = 'general') -> str:
+        """Highest scoring category; ties go to the earliest rule."""
+        scores = self.scores(text)
+        best = max(scores, key=scores.get, default=None)
+        if best is None or scores[best] <= 0:
+            return default
+        return best
+
+    def first(self, text: str, default: str = None) -> str:
+        """Category of the earliest rule with any keyword in text."""
+        found = [index for keyword in self.matches(text)
+                 for index, _, _ in self._keywords[keyword]]
+        if not found:
+            return default
+        return self.rules[min(found)][0]
+
+
+def _compile(keywords) -> re.Pattern:
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = keyword
+    alternatives = []
+    # Split by first character so the word-boundary check is done once per position
+    word_start = {ch: sub for ch, sub in trie.items() if _is_word(ch)}
+    other_start = {ch: sub for ch, sub in trie.items() if not _is_word(ch)}
+    if word_start:
+        alternatives.append(r'\b' + _trie_pattern(word_start))
+    if other_start:
+        alternatives.append(_trie_pattern(other_start))
+    return re.compile('|'.join(alternatives))
+
+
+def _trie_pattern(node: dict) -> str:
+    branches = [re.escape(ch) + _trie_pattern(sub) for ch, sub in sorted(node.items()) if ch]
+    keyword = node.get('')
+    if keyword is not None:
+        # Longer keywords are tried first; a keyword ending here comes last
+        branches.append(r's?\b' if _is_word(keyword[-1]) else '')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
@@ -0,0 +1,67 @@
+"""
+Category rules of the module and master-doc parsers.
+
+Parsed output depends on these, so this module is part of the ingest parser
+fingerprint: editing it re-parses every module on the next ingest.
+"""
+
+CATEGORY_EMOJI = {
+    '🔷': 'sql',
+    '🔶': 'python',
+    '🟢': 'stats',
+    '🟠': 'ml',
+    '🟣': 'terminology',
+}
+
+# Auto-tagging of imported text: a category scores the summed weight of the
+# distinct keywords it contains (case-insensitive, whole words, plural 's'
+# allowed). Ties go to the category listed first. Words common in plain
+# English count for less.
+CATEGORY_KEYWORDS = {
+    'sql': {
+        'SELECT': 1, 'FROM': 0.5, 'WHERE': 0.5, 'JOIN': 1, 'GROUP BY': 2, 'HAVING': 1,
+        'ORDER BY': 1, 'INSERT': 1, 'UPDATE': 0.5, 'DELETE': 0.5, 'CREATE TABLE': 2,
+        'ALTER': 0.5, 'INDEX': 0.5, 'UNION': 1, 'CTE': 1, 'WITH': 0.25, 'WINDOW': 0.5,
+        'PARTITION BY': 2, 'subquery': 1,
+    },
+    'python': {
+        'pandas': 2, 'numpy': 2, 'def ': 1, 'class ': 0.5, 'import ': 0.5, 'lambda': 1,
+        'list comprehension': 2, 'dict': 0.5, 'tuple': 1, 'generator': 1,
+        'decorator': 1, '.apply(': 2, '.groupby(': 2, '.merge(': 2, 'DataFrame': 2,
+    },
+    'stats': {
+        'probability': 1, 'p-value': 2, 'hypothesis': 1, 'confidence interval': 2,
+        'standard deviation': 1, 'variance': 1, 'bayes': 1, 'regression': 1,
+        'normal distribution': 1, 'CLT': 1, 'central limit': 2, 'sampling': 1,
+        'type I': 1, 'type II': 1, 'significance': 1, 'A/B test': 1, 'A/B testing': 1,
+    },
+    'ml': {
+        'model': 0.5, 'training': 0.5, 'overfitting': 1, 'underfitting': 1, 'bias-variance': 2,
+        'random forest': 2, 'gradient boosting': 2, 'XGBoost': 2, 'neural network': 2,
+        'regularization': 1, 'L1': 1, 'L2': 1, 'cross-validation': 2, 'feature': 0.5,
+        'precision': 1, 'recall': 1, 'F1': 1, 'AUC': 1, 'ROC': 1, 'classification': 1,
+        'clustering': 1, 'deep learning': 1, 'logistic regression': 1,
+    },
+}
+
+# Section-title categories for structured modules, highest priority first
+# (after the CATEGORY_EMOJI prefixes). Titles matching 'repeat' are then
+# checked against REPEAT_TITLE_RULES, falling back to 'review'.
+TITLE_CATEGORY_RULES = [
+    ('terminology', ['speed definition']),
+    ('sql', ['sql']),
+    ('stats', ['stats', 'probability']),
+    ('ml', ['ml', 'machine learning']),
+    ('python', ['python', 'pandas']),
+    ('product', ['product']),
+    ('behavioral', ['behavioral']),
+    ('review', ['self-test', 'self test']),
+    ('mixed', ['round']),
+    ('review', ['checklist', 'final']),
+    ('product', ['chicago', 'company']),
+    ('repeat', ['repeat']),
+]
+REPEAT_TITLE_RULES = [
+    ('ml', ['l1', 'l2']),
+    ('stats', ['standard error', 'se ']),
+]
@@ -7,127 +7,173 @@ Strategy:
 3. Fall back to paragraph chunking (~500 words)
 
 Auto-tag chunks by keyword detection.
+
+Parsing streams line by line (iter_sections), so large pastes and uploaded
+files never need every section in memory at once.
 """
 
+import io
 import re
+from app.parser.keywords import CATEGORY_KEYWORDS
 from app.models.module import Module, Section, ContentBlock
+from app.parser.classifier import KeywordClassifier
 
+HEADER_RE = re.compile(r'#{1,3}\s+\S')
+RULE_RE = re.compile(r'---+$')
 
-SQL_KEYWORDS = ['SELECT', 'FROM', 'WHERE', 'JOIN', 'GROUP BY', 'HAVING', 'ORDER BY',
-                'INSERT', 'UPDATE', 'DELETE', 'CREATE TABLE', 'ALTER', 'INDEX',
-                'UNION', 'CTE', 'WITH', 'WINDOW', 'PARTITION BY', 'subquery']
-
-PYTHON_KEYWORDS = ['pandas', 'numpy', 'def ', 'class ', 'import ', 'lambda',
-                   'list comprehension', 'dict', 'tuple', 'generator',
-                   'decorator', '.apply(', '.groupby(', '.merge(', 'DataFrame']
 
-STATS_KEYWORDS = ['probability', 'p-value', 'hypothesis', 'confidence interval',
-                  'standard deviation', 'variance', 'bayes', 'regression',
-                  'normal distribution', 'CLT', 'central limit', 'sampling',
-                  'type I', 'type II', 'significance', 'A/B test']
-
-ML_KEYWORDS = ['model', 'training', 'overfitting', 'underfitting', 'bias-variance',
-               'random forest', 'gradient boosting', 'XGBoost', 'neural network',
-               'regularization', 'L1', 'L2', 'cross-validation', 'feature',
-               'precision', 'recall', 'F1', 'AUC', 'ROC', 'classification',
-               'clustering', 'deep learning', 'logistic regression']
+_classifier = KeywordClassifier(CATEGORY_KEYWORDS.items())
 
 
 def parse_master_doc(content: str, module_id: str = None, title: str = 'Imported Content') -> Module:
     """Parse unstructured markdown into a Module."""
-    if module_id is None:
-        module_id = 'imported-' + re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
-
-    sections = []
+    module = new_import_module(title, module_id)
+    module.sections = list(iter_sections(io.StringIO(content)))
+    return module
 
-    # Strategy 1: Split on headers
-    header_chunks = re.split(r'\n(#{1,3}\s+.+)', content)
-    if len(header_chunks) > 2:
-        sections = _parse_header_chunks(header_chunks)
-    else:
-        # Strategy 2: Split on horizontal rules
-        hr_chunks = re.split(r'\n---+\n', content)
-        if len(hr_chunks) > 1:
-            sections = _parse_plain_chunks(hr_chunks)
-        else:
-            # Strategy 3: Paragraph chunking
-            sections = _chunk_by_paragraphs(content)
-
-    for i, section in enumerate(sections):
-        section.order = i
 
+def new_import_module(title: str = 'Imported Content', module_id: str = None) -> Module:
+    """Module shell (no sections yet) for imported content."""
+    if module_id is None:
+        module_id = 'imported-' + re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
     return Module(
         id=module_id,
         title=title,
         number=0,
         subtitle='Imported content',
-        sections=sections,
     )
 
 
-def _parse_header_chunks(chunks: list) -> list:
-    sections = []
-    i = 0
-    while i < len(chunks):
-        chunk = chunks[i].strip()
-        if chunk.startswith('#'):
-            title = re.sub(r'^#+\s*', '', chunk)
-            body = chunks[i + 1] if i + 1 < len(chunks) else ''
-            category = auto_tag(title + ' ' + body)
-            blocks = _text_to_blocks(body)
-            sections.append(Section(title=title, category=category, blocks=blocks))
-            i += 2
+def iter_sections(stream):
+    """Yield Sections from a seekable text stream, holding one section at a time.
+
+    The stream is read twice: a first pass only looks for header and
+    horizontal-rule lines to pick the split strategy, the second pass
+    builds sections. Lines inside fenced code never count as boundaries.
+    """
+    strategy = _detect_strategy(stream)
+    stream.seek(0)
+    if strategy == 'headers':
+        sections = _stream_header_sections(stream)
+    elif strategy == 'rules':
+        sections = _stream_rule_sections(stream)
+    else:
+        sections = _stream_paragraph_sections(stream)
+    for i, section in enumerate(sections):
+        section.order = i
+        yield section
+
+
+def _iter_lines(stream):
+    """Yield (line, in_code) pairs; fence lines themselves count as code."""
+    in_code = False
+    for line in stream:
+        line = line.rstrip('\r\n')
+        if line.lstrip().startswith('```'):
+            in_code = not in_code
+            yield line, True
         else:
-            if chunk:
-                category = auto_tag(chunk)
-                blocks = _text_to_blocks(chunk)
-                sections.append(Section(title='Introduction', category=category, blocks=blocks))
-            i += 1
-    return sections
-
-
-def _parse_plain_chunks(chunks: list) -> list:
-    sections = []
-    for i, chunk in enumerate(chunks):
-        chunk = chunk.strip()
-        if not chunk:
+            yield line, in_code
+
+
+def _detect_strategy(stream) -> str:
+    has_rule = False
+    for line, in_code in _iter_lines(stream):
+        if in_code:
             continue
-        # Use first line as title
-        lines = chunk.split('\n', 1)
-        title = lines[0].strip().strip('#').strip('*').strip()[:80]
-        category = auto_tag(chunk)
-        blocks = _text_to_blocks(chunk)
-        sections.append(Section(title=title, category=category, blocks=blocks))
-    return sections
-
-
-def _chunk_by_paragraphs(content: str, target_words: int = 500) -> list:
-    paragraphs = re.split(r'\n\n+', content)
-    sections = []
-    current_lines = []
-    current_words = 0
+        if HEADER_RE.match(line):
+            return 'headers'
+        if RULE_RE.match(line):
+            has_rule = True
+    return 'rules' if has_rule else 'paragraphs'
+
+
+def _stream_header_sections(stream):
+    title = None
+    body = []
+    for line, in_code in _iter_lines(stream):
+        if not in_code and HEADER_RE.match(line):
+            section = _header_section(title, body)
+            if section:
+                yield section
+            title = re.sub(r'^#+\s*', '', line).strip()
+            body = []
+        else:
+            body.append(line)
+    section = _header_section(title, body)
+    if section:
+        yield section
+
+
+def _header_section(title, body_lines):
+    body = '\n'.join(body_lines)
+    if title is None:
+        # Text before the first header
+        body = body.strip()
+        if not body:
+            return None
+        return Section(title='Introduction', category=auto_tag(body), blocks=_text_to_blocks(body))
+    return Section(title=title, category=auto_tag(title + ' ' + body), blocks=_text_to_blocks(body))
+
+
+def _stream_rule_sections(stream):
+    chunk = []
+    for line, in_code in _iter_lines(stream):
+        if not in_code and RULE_RE.match(line):
+            section = _plain_section('\n'.join(chunk))
+            if section:
+                yield section
+            chunk = []
+        else:
+            chunk.append(line)
+    section = _plain_section('\n'.join(chunk))
+    if section:
+        yield section
+
+
+def _plain_section(chunk: str):
+    chunk = chunk.strip()
+    if not chunk:
+        return None
+    # Use first line as title
+    title = chunk.split('\n', 1)[0].strip().strip('#').strip('*').strip()[:80]
+    return Section(title=title, category=auto_tag(chunk), blocks=_text_to_blocks(chunk))
 
-    for para in paragraphs:
-        words = len(para.split())
-        if current_words + words > target_words and current_lines:
-            text = '\n\n'.join(current_lines)
-            title = current_lines[0][:80].strip('# *')
-            category = auto_tag(text)
-            blocks = _text_to_blocks(text)
-            sections.append(Section(title=title, category=category, blocks=blocks))
-            current_lines = []
+
+def _stream_paragraph_sections(stream, target_words: int = 500):
+    current_paras = []
+    current_words = 0
+    para = []
+
+    def paragraphs():
+        nonlocal para
+        for line, in_code in _iter_lines(stream):
+            if not in_code and not line.strip():
+                if para:
+                    yield '\n'.join(para)
+                    para = []
+            else:
+                para.append(line)
+        if para:
+            yield '\n'.join(para)
+
+    for text in paragraphs():
+        words = len(text.split())
+        if current_words + words > target_words and current_paras:
+            yield _paragraph_section(current_paras)
+            current_paras = []
             current_words = 0
-        current_lines.append(para)
+        current_paras.append(text)
         current_words += words
 
-    if current_lines:
-        text = '\n\n'.join(current_lines)
-        title = current_lines[0][:80].strip('# *')
-        category = auto_tag(text)
-        blocks = _text_to_blocks(text)
-        sections.append(Section(title=title, category=category, blocks=blocks))
+    if current_paras:
+        yield _paragraph_section(current_paras)
+
 
-    return sections
+def _paragraph_section(paras: list):
+    text = '\n\n'.join(paras)
+    title = paras[0][:80].strip('# *')
+    return Section(title=title, category=auto_tag(text), blocks=_text_to_blocks(text))
 
 
 def _text_to_blocks(text: str) -> list:
@@ -149,17 +195,4 @@ def _text_to_blocks(text: str) -> list:
 
 def auto_tag(text: str) -> str:
     """Auto-detect category from text content."""
-    text_upper = text.upper()
-    text_lower = text.lower()
-
-    scores = {
-        'sql': sum(1 for kw in SQL_KEYWORDS if kw.upper() in text_upper),
-        'python': sum(1 for kw in PYTHON_KEYWORDS if kw.lower() in text_lower),
-        'stats': sum(1 for kw in STATS_KEYWORDS if kw.lower() in text_lower),
-        'ml': sum(1 for kw in ML_KEYWORDS if kw.lower() in text_lower),
-    }
-
-    best = max(scores, key=scores.get)
-    if scores[best] > 0:
-        return best
-    return 'general'
+    return _classifier.best(text)
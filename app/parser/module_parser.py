@@ -14,7 +14,12 @@ Handles patterns:
 import re
 import os
 from app.models.module import Module, Section, ContentBlock
-from app.config import CATEGORY_EMOJI
+from app.parser.keywords import CATEGORY_EMOJI, TITLE_CATEGORY_RULES, REPEAT_TITLE_RULES
+from app.parser.classifier import KeywordClassifier
+
+_title_classifier = KeywordClassifier(
+    [(cat, [emoji]) for emoji, cat in CATEGORY_EMOJI.items()] + TITLE_CATEGORY_RULES)
+_repeat_classifier = KeywordClassifier(REPEAT_TITLE_RULES)
 
 
 def parse_module_file(filepath: str) -> Module:
@@ -134,41 +139,8 @@ def parse_module_file(filepath: str) -> Module:
 
 def detect_category(title: str) -> str:
     """Detect category from emoji prefix or keywords in section title."""
-    for emoji, cat in CATEGORY_EMOJI.items():
-        if emoji in title:
-            return cat
-
-    title_lower = title.lower()
-
-    # Module 14 round-based detection
-    if 'speed definition' in title_lower:
-        return 'terminology'
-    if 'sql' in title_lower:
-        return 'sql'
-    if 'stats' in title_lower or 'probability' in title_lower:
-        return 'stats'
-    if 'ml' in title_lower or 'machine learning' in title_lower:
-        return 'ml'
-    if 'python' in title_lower or 'pandas' in title_lower:
-        return 'python'
-    if 'product' in title_lower:
-        return 'product'
-    if 'behavioral' in title_lower:
-        return 'behavioral'
-    if 'self-test' in title_lower or 'self test' in title_lower:
-        return 'review'
-    if 'round' in title_lower:
-        return 'mixed'
-    if 'checklist' in title_lower or 'final' in title_lower:
-        return 'review'
-    if 'chicago' in title_lower or 'company' in title_lower:
-        return 'product'
-    if 'repeat' in title_lower:
+    category = _title_classifier.first(title, default='general')
+    if category == 'repeat':
         # "Repeat: L1 vs L2" etc
-        if 'l1' in title_lower or 'l2' in title_lower:
-            return 'ml'
-        if 'standard error' in title_lower or 'se ' in title_lower:
-            return 'stats'
-        return 'review'
-
-    return 'general'
+        return _repeat_classifier.first(title, default='review')
+    return category
@@ -12,8 +12,79 @@ Mapping rules:
 """
 
 import re
-from app.models.module import Module, Section, ContentBlock
-from app.models.question import Question
+from typing import NamedTuple
+from app.models.module import Module, Section
+from app.models.question import Question, dedupe_ids
+
+
+STAR_RUBRIC = [
+    'Used "I" not "we"',
+    'Quantified the result',
+    'Kept under 2 minutes',
+    'Clear situation/context',
+    'Specific actions taken',
+]
+
+QUOTED_PROMPT_RE = re.compile(r'\*\*(?:\d+\.\s*)?"([^"]+)"\*\*(?:\s*\((\d+\s*min)\))?')
+
+# Token kinds. Each section is tokenized once and every extractor walks the
+# same token list.
+QUIZ = 'quiz'            # **Quick quiz...** marker; text is the rest of the line
+ANSWER = 'answer'        # **Answer:** marker; text is the rest of the line
+ANSWERS = 'answers'      # **Answers:** marker opening a list of numbered answers
+ITEM = 'item'            # "N. text"; number and text after the number
+BOLD_ITEM = 'bold_item'  # "**N.** text" or "**N. text**"; number and text
+TEXT = 'text'            # any other non-blank line
+BLANK = 'blank'          # empty line
+CODE = 'code'            # a whole code block; text is its content
+
+# Alternatives are tried in order, so "**1.** x" is a BOLD_ITEM, never a TEXT
+_LINE_RE = re.compile(
+    r'(?P<quiz>\*\*Quick quiz[^*]*\*\*[:\s]*)'
+    r'|(?P<answer>\*\*Answer:?\*\*[:\s]*)'
+    r'|(?P<answers>\*\*Answers:?\*\*[:\s]*)'
+    r'|\*\*(?P<bold_num>\d+)\.?\*\*\s*'
+    r'|\*\*(?P<bold_title_num>\d+)\.\s+(?P<bold_title>.*?)\*\*'
+    r'|(?P<num>\d+)\.\s+',
+    re.IGNORECASE,
+)
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str  # parsed content (see kinds above)
+    line: str = ''  # the raw line, for text-based tokens
+    number: int = None  # ITEM / BOLD_ITEM only
+    language: str = None  # CODE only
+    block: int = 0  # index of the block the token came from
+
+
+def tokenize_section(section: Section) -> list:
+    """Split a section's blocks into typed tokens in a single pass."""
+    tokens = []
+    for b, block in enumerate(section.blocks):
+        if block.type == 'code':
+            tokens.append(Token(CODE, block.content, language=block.language, block=b))
+            continue
+        if block.type != 'text':
+            continue
+        for line in block.content.split('\n'):
+            if not line.strip():
+                tokens.append(Token(BLANK, '', line, block=b))
+                continue
+            m = _LINE_RE.match(line)
+            if m is None:
+                tokens.append(Token(TEXT, line, line, block=b))
+            elif m.lastgroup == 'bold_title':
+                tokens.append(Token(BOLD_ITEM, m.group('bold_title'), line,
+                                    int(m.group('bold_title_num')), block=b))
+            elif m.group('bold_num'):
+                tokens.append(Token(BOLD_ITEM, line[m.end():], line, int(m.group('bold_num')), block=b))
+            elif m.group('num'):
+                tokens.append(Token(ITEM, line[m.end():], line, int(m.group('num')), block=b))
+            else:
+                tokens.append(Token(m.lastgroup, line[m.end():], line, block=b))
+    return tokens
 
 
 def extract_questions(module: Module) -> list:
@@ -23,195 +94,137 @@ def extract_questions(module: Module) -> list:
         section_questions = extract_from_section(module.id, section)
         questions.extend(section_questions)
 
-    return questions
+    return dedupe_ids(questions)
 
 
 def extract_from_section(module_id: str, section: Section) -> list:
     questions = []
     title_lower = section.title.lower()
+    tokens = tokenize_section(section)
 
     # Self-Test sections
     if 'self-test' in title_lower or 'self test' in title_lower:
-        questions.extend(extract_self_test(module_id, section))
+        questions.extend(extract_self_test(module_id, section, tokens))
         return questions
 
     # Module 14 round-based sections
     if re.match(r'round\s+\d+', title_lower):
-        questions.extend(extract_round_questions(module_id, section))
+        questions.extend(extract_round_questions(module_id, section, tokens))
         return questions
 
     # Behavioral / STAR sections
     if 'behavioral' in title_lower or 'star' in title_lower.split(':')[-1] if ':' in title_lower else title_lower:
-        questions.extend(extract_behavioral(module_id, section))
+        questions.extend(extract_behavioral(module_id, section, tokens))
 
     # Regular sections: look for Quick Quiz / Answer pairs
-    questions.extend(extract_quick_quizzes(module_id, section))
+    questions.extend(extract_quick_quizzes(module_id, section, tokens))
 
     return questions
 
 
-def extract_quick_quizzes(module_id: str, section: Section) -> list:
-    """Extract Quick Quiz + Answer pairs from section blocks."""
-    questions = []
-    blocks = section.blocks
+def extract_quick_quizzes(module_id: str, section: Section, tokens: list = None) -> list:
+    """Extract Quick Quiz + Answer pairs from section blocks.
 
-    for i, block in enumerate(blocks):
-        if block.type != 'text':
+    The prompt runs from the quiz marker to a blank line or an answer
+    marker, the answer from its marker to the next blank line. Both must be
+    in the same text block.
+    """
+    questions = []
+    prompt_lines = None  # set while a quiz is open
+    answer_lines = None  # set once its answer marker is seen
+    reading_prompt = False
+    block = None
+
+    def flush():
+        quiz_text = '\n'.join(prompt_lines).strip()
+        answer_text = '\n'.join(answer_lines).strip()
+        if _answer_is_code(answer_text, section.category):
+            questions.append(Question.create(
+                module_id=module_id,
+                section_title=section.title,
+                category=section.category,
+                question_type='code_practice',
+                prompt=quiz_text,
+                answer=answer_text,
+                code_language='sql' if section.category == 'sql' else 'python',
+            ))
+        else:
+            questions.append(Question.create(
+                module_id=module_id,
+                section_title=section.title,
+                category=section.category,
+                question_type='free_text',
+                prompt=quiz_text,
+                answer=answer_text,
+            ))
+
+    for tok in tokens if tokens is not None else tokenize_section(section):
+        if prompt_lines is not None and (tok.block != block or (answer_lines is not None and tok.kind == BLANK)):
+            if answer_lines is not None:
+                flush()
+            prompt_lines = answer_lines = None
+
+        if tok.kind == QUIZ:
+            if answer_lines is not None:
+                flush()
+            prompt_lines, answer_lines = [tok.text], None
+            reading_prompt, block = True, tok.block
+        elif prompt_lines is None:
             continue
-
-        text = block.content
-
-        # Find Quick Quiz patterns
-        quiz_matches = list(re.finditer(
-            r'\*\*Quick quiz[^*]*\*\*[:\s]*(.+?)(?=\n\n|\n\*\*Answer)',
-            text, re.DOTALL | re.IGNORECASE
-        ))
-
-        if not quiz_matches:
-            # Try alternate pattern: the quiz and answer on separate lines
-            lines = text.split('\n')
-            quiz_start = None
-            quiz_text = ''
-            answer_text = ''
-
-            for j, line in enumerate(lines):
-                if re.match(r'\*\*Quick quiz', line, re.IGNORECASE):
-                    # Extract question part after the bold marker
-                    q_match = re.match(r'\*\*Quick quiz[^*]*\*\*[:\s]*(.*)', line, re.IGNORECASE)
-                    if q_match:
-                        quiz_text = q_match.group(1).strip()
-                        quiz_start = j
-                elif quiz_start is not None and re.match(r'\*\*Answer:?\*\*', line, re.IGNORECASE):
-                    a_match = re.match(r'\*\*Answer:?\*\*[:\s]*(.*)', line, re.IGNORECASE)
-                    if a_match:
-                        answer_text = a_match.group(1).strip()
-                        # Collect continuation lines
-                        for k in range(j + 1, len(lines)):
-                            if lines[k].strip() == '' or lines[k].startswith('**'):
-                                break
-                            answer_text += '\n' + lines[k]
-
-                    # Check if the answer includes code (look at next block)
-                    has_code = False
-                    code_content = ''
-                    code_lang = None
-                    if i + 1 < len(blocks) and blocks[i + 1].type == 'code':
-                        # The answer is actually a code block
-                        has_code = True
-                        code_content = blocks[i + 1].content
-                        code_lang = blocks[i + 1].language
-
-                    # Also check if answer block following this text block is code
-                    answer_has_code = bool(re.search(r'```', answer_text))
-
-                    if has_code or _answer_is_code(answer_text, section.category):
-                        q_type = 'code_practice'
-                        lang = code_lang or ('sql' if section.category == 'sql' else 'python')
-                        full_answer = (answer_text + '\n' + code_content).strip() if code_content else answer_text
-                        questions.append(Question.create(
-                            module_id=module_id,
-                            section_title=section.title,
-                            category=section.category,
-                            question_type=q_type,
-                            prompt=quiz_text,
-                            answer=full_answer,
-                            code_language=lang,
-                        ))
-                    else:
-                        questions.append(Question.create(
-                            module_id=module_id,
-                            section_title=section.title,
-                            category=section.category,
-                            question_type='free_text',
-                            prompt=quiz_text,
-                            answer=answer_text,
-                        ))
-
-                    quiz_start = None
-                    quiz_text = ''
-                    answer_text = ''
-
-        # Also check for answer in the NEXT text block if quiz found but no answer in same block
-        for match in quiz_matches:
-            quiz_text = match.group(1).strip()
-            # Find the answer
-            after_quiz = text[match.end():]
-            a_match = re.search(r'\*\*Answer:?\*\*[:\s]*(.*?)(?:\n\n|$)', after_quiz, re.DOTALL | re.IGNORECASE)
-            if a_match:
-                answer_text = a_match.group(1).strip()
-
-                if _answer_is_code(answer_text, section.category):
-                    lang = 'sql' if section.category == 'sql' else 'python'
-                    questions.append(Question.create(
-                        module_id=module_id,
-                        section_title=section.title,
-                        category=section.category,
-                        question_type='code_practice',
-                        prompt=quiz_text,
-                        answer=answer_text,
-                        code_language=lang,
-                    ))
-                else:
-                    questions.append(Question.create(
-                        module_id=module_id,
-                        section_title=section.title,
-                        category=section.category,
-                        question_type='free_text',
-                        prompt=quiz_text,
-                        answer=answer_text,
-                    ))
-
-    # Also look for code blocks that follow quiz text patterns
-    for i, block in enumerate(blocks):
-        if block.type == 'text' and i + 2 < len(blocks):
-            text = block.content
-            if re.search(r'\*\*Quick quiz', text, re.IGNORECASE):
-                # Check if we have text -> code (answer) pattern
-                next_block = blocks[i + 1]
-                if next_block.type == 'code':
-                    # Already handled above in most cases
-                    pass
-
+        elif answer_lines is not None:
+            answer_lines.append(tok.line)
+        elif tok.kind == ANSWER:
+            answer_lines = [tok.text]
+        elif tok.kind in (BLANK, ANSWERS):
+            reading_prompt = False
+        elif reading_prompt:
+            prompt_lines.append(tok.line)
+
+    if answer_lines is not None:
+        flush()
     return questions
 
 
-def extract_self_test(module_id: str, section: Section) -> list:
-    """Extract numbered Q&A from Self-Test sections."""
+def extract_self_test(module_id: str, section: Section, tokens: list = None) -> list:
+    """Extract numbered Q&A from Self-Test sections.
+
+    Numbered items before the **Answers:** marker are questions, the ones
+    after it answers; each runs until the next numbered item. Code blocks
+    are ignored.
+    """
     questions = []
-    all_text = '\n'.join(
-        block.content for block in section.blocks if block.type == 'text'
-    )
+    prompts = []  # (number, lines)
+    answers = []
+    items = prompts
 
-    # Split on **Answers:** marker
-    parts = re.split(r'\*\*Answers?:?\*\*', all_text, maxsplit=1)
-    if len(parts) < 2:
+    for tok in tokens if tokens is not None else tokenize_section(section):
+        if tok.kind == CODE:
+            continue
+        if tok.kind in (ANSWER, ANSWERS) and items is prompts:
+            items = answers
+        elif tok.kind == ITEM:
+            items.append((tok.number, [tok.text]))
+        elif items:
+            items[-1][1].append(tok.line)
+
+    if items is prompts:
         return questions
 
-    q_text = parts[0]
-    a_text = parts[1]
-
-    # Extract numbered questions
-    q_matches = re.findall(r'(\d+)\.\s+(.+?)(?=\n\d+\.|\n*$)', q_text, re.DOTALL)
-    a_matches = re.findall(r'(\d+)\.\s+(.+?)(?=\n\d+\.|\n*$)', a_text, re.DOTALL)
-
-    answer_map = {int(n): a.strip() for n, a in a_matches}
-
-    for num_str, q in q_matches:
-        num = int(num_str)
-        answer = answer_map.get(num, '')
+    answer_map = {num: '\n'.join(lines).strip() for num, lines in answers}
+    for num, lines in prompts:
         questions.append(Question.create(
             module_id=module_id,
             section_title=section.title,
             category=section.category if section.category != 'review' else 'general',
             question_type='free_text',
-            prompt=q.strip(),
-            answer=answer,
+            prompt='\n'.join(lines).strip(),
+            answer=answer_map.get(num, ''),
         ))
 
     return questions
 
 
-def extract_round_questions(module_id: str, section: Section) -> list:
+def extract_round_questions(module_id: str, section: Section, tokens: list = None) -> list:
     """Extract questions from Module 14's round-based format."""
     questions = []
     title_lower = section.title.lower()
@@ -246,120 +259,97 @@ def extract_round_questions(module_id: str, section: Section) -> list:
         elif 'definition' in title_lower:
             category = 'terminology'
 
-    # Parse numbered questions with inline or block answers
-    blocks = section.blocks
+    code_language = None
+    if q_type == 'code_practice':
+        code_language = 'sql' if category == 'sql' else 'python'
+
+    # Numbered questions (**N. question** or **N.** question) with the
+    # lines and code blocks up to the next one as the answer
     current_question = None
     current_answer_lines = []
 
-    for bi, block in enumerate(blocks):
-        if block.type == 'text':
-            lines = block.content.split('\n')
-            for line in lines:
-                # Numbered question: **N. question** or **N.** question
-                q_match = re.match(r'\*\*(\d+)\.?\*\*\s*(.*)', line)
-                if not q_match:
-                    q_match = re.match(r'\*\*(\d+)\.\s+(.*?)\*\*', line)
-
-                if q_match:
-                    # Save previous question
-                    if current_question:
-                        answer = '\n'.join(current_answer_lines).strip()
-                        questions.append(Question.create(
-                            module_id=module_id,
-                            section_title=section.title,
-                            category=category,
-                            question_type=q_type,
-                            prompt=current_question,
-                            answer=answer,
-                            code_language='sql' if q_type == 'code_practice' and category == 'sql' else
-                                          'python' if q_type == 'code_practice' else None,
-                        ))
-                        current_answer_lines = []
-
-                    current_question = q_match.group(2).strip().rstrip('*')
-                elif current_question:
-                    # This is part of the answer
-                    if line.strip():
-                        current_answer_lines.append(line)
-
-        elif block.type == 'code' and current_question:
-            # For code_practice, store raw code; for others, wrap in fences for markdown
-            if q_type == 'code_practice':
-                current_answer_lines.append(block.content)
-            else:
-                current_answer_lines.append(f'```{block.language or ""}\n{block.content}\n```')
-
-    # Flush last question
-    if current_question:
-        answer = '\n'.join(current_answer_lines).strip()
+    def flush():
         questions.append(Question.create(
             module_id=module_id,
             section_title=section.title,
             category=category,
             question_type=q_type,
             prompt=current_question,
-            answer=answer,
-            code_language='sql' if q_type == 'code_practice' and category == 'sql' else
-                          'python' if q_type == 'code_practice' else None,
+            answer='\n'.join(current_answer_lines).strip(),
+            code_language=code_language,
         ))
 
+    for tok in tokens if tokens is not None else tokenize_section(section):
+        if tok.kind == BOLD_ITEM:
+            if current_question:
+                flush()
+                current_answer_lines = []
+            current_question = tok.text.strip().rstrip('*')
+        elif not current_question:
+            continue
+        elif tok.kind == CODE:
+            # For code_practice, store raw code; for others, wrap in fences for markdown
+            if q_type == 'code_practice':
+                current_answer_lines.append(tok.text)
+            else:
+                current_answer_lines.append(f'```{tok.language or ""}\n{tok.text}\n```')
+        elif tok.kind != BLANK:
+            current_answer_lines.append(tok.line)
+
+    # Flush last question
+    if current_question:
+        flush()
+
     return questions
 
 
-def extract_behavioral(module_id: str, section: Section) -> list:
+def extract_behavioral(module_id: str, section: Section, tokens: list = None) -> list:
     """Extract behavioral/STAR practice prompts."""
     questions = []
-
-    for block in section.blocks:
-        if block.type != 'text':
+    quoted = []  # quoted prompts of the current block, added after its homework prompts
+    block = None
+
+    for tok in tokens if tokens is not None else tokenize_section(section):
+        if tok.block != block:
+            questions.extend(quoted)
+            quoted = []
+            block = tok.block
+        if tok.kind == CODE:
             continue
 
-        text = block.content
+        line = tok.line
+        line_lower = line.lower()
 
         # Look for homework prompts
-        if 'homework' in text.lower() or 'practice' in text.lower():
-            # Extract the prompt
-            lines = text.split('\n')
-            for line in lines:
-                if ('homework' in line.lower() or 'practice saying' in line.lower()) and ':' in line:
-                    prompt = line.split(':', 1)[-1].strip().strip('*')
-                    if len(prompt) > 20:
-                        questions.append(Question.create(
-                            module_id=module_id,
-                            section_title=section.title,
-                            category='behavioral',
-                            question_type='star_practice',
-                            prompt=prompt,
-                            answer='Use the STAR framework: Situation, Task, Action, Result. Keep under 2 minutes.',
-                            rubric=[
-                                'Used "I" not "we"',
-                                'Quantified the result',
-                                'Kept under 2 minutes',
-                                'Clear situation/context',
-                                'Specific actions taken',
-                            ],
-                        ))
+        if ('homework' in line_lower or 'practice saying' in line_lower) and ':' in line:
+            prompt = line.split(':', 1)[-1].strip().strip('*')
+            if len(prompt) > 20:
+                questions.append(Question.create(
+                    module_id=module_id,
+                    section_title=section.title,
+                    category='behavioral',
+                    question_type='star_practice',
+                    prompt=prompt,
+                    answer='Use the STAR framework: Situation, Task, Action, Result. Keep under 2 minutes.',
+                    rubric=list(STAR_RUBRIC),
+                ))
 
         # Look for quoted behavioral prompts like **"Tell me about..."**
-        beh_matches = re.findall(r'\*\*(?:\d+\.\s*)?"([^"]+)"\*\*(?:\s*\((\d+\s*min)\))?', text)
-        for prompt, time_limit in beh_matches:
+        if '"' not in line:
+            continue
+        for prompt, time_limit in QUOTED_PROMPT_RE.findall(line):
             if any(kw in prompt.lower() for kw in ['tell me', 'describe', 'how do you', 'give me an example']):
-                questions.append(Question.create(
+                quoted.append(Question.create(
                     module_id=module_id,
                     section_title=section.title,
                     category='behavioral',
                     question_type='star_practice',
                     prompt=prompt,
                     answer='Use the STAR framework: Situation, Task, Action, Result.',
-                    rubric=[
-                        'Used "I" not "we"',
-                        'Quantified the result',
-                        'Kept under 2 minutes',
-                        'Clear situation/context',
-                        'Specific actions taken',
-                    ],
+                    rubric=list(STAR_RUBRIC),
                 ))
 
+    questions.extend(quoted)
     return questions
 
 
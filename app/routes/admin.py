@@ -1,12 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from app.storage.module_store import list_modules, save_module
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from app.storage.module_store import list_modules
 from app.storage.question_store import (
     load_questions, load_all_questions, add_question, update_question, delete_question
 )
+from app.storage.ingest_job_store import spool, submit_job, get_job, cancel_job, list_jobs
 from app.models.question import Question, QUESTION_TYPES
-from app.parser.master_doc_parser import parse_master_doc
-from app.parser.question_extractor import extract_questions
-from app.storage.question_store import save_questions
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -17,27 +15,62 @@ def ingest():
         content = request.form.get('content', '')
         title = request.form.get('title', 'Imported Content')
         action = request.form.get('action', 'preview')
-
-        if not content.strip():
+        upload = request.files.get('file')
+
+        # The source is spooled to disk here; parsing happens in a background job
+        filename = upload.filename if upload and upload.filename else ''
+        if filename:
+            path = spool(upload.stream)
+        elif content.strip():
+            path = spool(content)
+        else:
             flash('No content provided', 'error')
             return redirect(url_for('admin.ingest'))
 
-        module = parse_master_doc(content, title=title)
-        questions = extract_questions(module)
-
-        if action == 'save':
-            save_module(module)
-            save_questions(module.id, questions)
-            flash(f'Saved module "{title}" with {len(module.sections)} sections and {len(questions)} questions', 'success')
-            return redirect(url_for('main.dashboard'))
-
-        return render_template('admin/ingest.html',
-                               preview_module=module,
-                               preview_questions=questions,
-                               content=content,
-                               title=title)
-
-    return render_template('admin/ingest.html')
+        job = submit_job(path, title=title, action='save' if action == 'save' else 'preview',
+                         filename=filename)
+        return redirect(url_for('admin.ingest_job', job_id=job.id))
+
+    return render_template('admin/ingest.html', jobs=list_jobs())
+
+
+@admin_bp.route('/ingest/jobs/<job_id>')
+def ingest_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    return render_template('admin/ingest.html', job=job, jobs=list_jobs())
+
+
+@admin_bp.route('/ingest/jobs/<job_id>/status')
+def ingest_job_status(job_id):
+    """Status panel for HTMX polling, or the job as JSON for anything else."""
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    if request.headers.get('HX-Request'):
+        return render_template('admin/partials/job.html', job=job)
+    return jsonify(job.to_dict())
+
+
+@admin_bp.route('/ingest/jobs/<job_id>/cancel', methods=['POST'])
+def ingest_job_cancel(job_id):
+    job = cancel_job(job_id)
+    if job is None:
+        abort(404)
+    if request.headers.get('HX-Request'):
+        return render_template('admin/partials/job.html', job=job)
+    return redirect(url_for('admin.ingest_job', job_id=job.id))
+
+
+@admin_bp.route('/ingest/jobs/<job_id>/save', methods=['POST'])
+def ingest_job_save(job_id):
+    """Save a previewed import without sending it again."""
+    preview = get_job(job_id)
+    if preview is None or preview.status != 'done':
+        abort(404)
+    job = submit_job(preview.path, title=preview.title, action='save', filename=preview.filename)
+    return redirect(url_for('admin.ingest_job', job_id=job.id))
 
 
 @admin_bp.route('/questions')
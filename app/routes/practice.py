@@ -1,88 +1,85 @@
-from flask import Blueprint, render_template, request, jsonify
-from app.storage.question_store import load_all_questions
-from app.storage.challenge_store import load_all_challenges, load_challenge
-from app.sql_runner import execute_and_compare
+from flask import Blueprint, render_template, request, jsonify, abort
+from app.config import PRACTICE_PAGE_SIZE
+from app.storage.question_store import all_questions_version, get_question
+from app.storage.challenge_store import (load_challenge, load_challenge_tables, load_challenge_cases,
+                                         challenges_version, content_hash)
+from app.storage import search_index
+from app.http_cache import etag_cached
 
 practice_bp = Blueprint('practice', __name__, url_prefix='/practice')
 
+# ?source= values -> item 'source' field
+SOURCE_FILTERS = {'modules': 'module', 'challenges': 'challenge'}
+SCHEMA_SAMPLE_ROWS = 10  # rows shown per sql_data table in the schema panel
+
+
+def _browse_versions(**kwargs):
+    return all_questions_version(), challenges_version()
+
 
 @practice_bp.route('/')
+@etag_cached(_browse_versions)
 def browse():
-    category = request.args.get('category', '')
-    q_type = request.args.get('type', '')
-    source = request.args.get('source', '')
-    search = request.args.get('search', '').strip().lower()
-
-    # load module questions
-    module_questions = []
-    if source != 'challenges':
-        for q in load_all_questions():
-            module_questions.append({
-                'id': q.id,
-                'title': q.prompt[:120],
-                'prompt': q.prompt,
-                'answer': q.answer,
-                'category': q.category,
-                'question_type': q.question_type,
-                'source': 'module',
-                'module_id': q.module_id,
-                'section_title': q.section_title,
-                'code_language': q.code_language,
-                'rubric': q.rubric,
-                'is_challenge': False,
-            })
-
-    # load standalone challenges
-    challenges = []
-    if source != 'modules':
-        for c in load_all_challenges():
-            challenges.append({
-                'id': c['id'],
-                'title': c['title'],
-                'prompt': c['prompt'],
-                'answer': c['answer'],
-                'category': c.get('category', ''),
-                'question_type': 'sql_challenge',
-                'source': 'challenge',
-                'difficulty': c.get('difficulty', ''),
-                'scenario': c.get('scenario', ''),
-                'sql_setup': c.get('sql_setup', ''),
-                'sql_answer': c.get('sql_answer', ''),
-                'expected_columns': c.get('expected_columns', []),
-                'expected_rows': c.get('expected_rows', []),
-                'concepts': c.get('concepts', []),
-                'rubric': c.get('rubric', []),
-                'is_challenge': True,
-            })
-
-    items = module_questions + challenges
-
-    # filters
-    if category:
-        items = [i for i in items if i['category'] == category]
-    if q_type:
-        if q_type == 'sql_challenge':
-            items = [i for i in items if i['is_challenge']]
-        else:
-            items = [i for i in items if i['question_type'] == q_type]
-    if search:
-        items = [i for i in items if search in i['prompt'].lower() or search in i['title'].lower()]
-
-    # collect filter options
-    all_items = module_questions + challenges
-    categories = sorted(set(i['category'] for i in all_items if i['category']))
-    types = sorted(set(i['question_type'] for i in all_items))
-
+    page = _search_page()
     return render_template('practice/browse.html',
-                           items=items,
-                           categories=categories,
-                           types=types,
-                           selected_category=category,
-                           selected_type=q_type,
-                           selected_source=source,
+                           page=page,
+                           categories=search_index.facet_values('category'),
+                           types=search_index.facet_values('question_type'),
+                           selected_category=request.args.get('category', ''),
+                           selected_type=request.args.get('type', ''),
+                           selected_source=request.args.get('source', ''),
                            search_query=request.args.get('search', ''))
 
 
+@practice_bp.route('/items')
+@etag_cached(_browse_versions)
+def items():
+    """Next page of results, requested by the infinite-scroll sentinel."""
+    return render_template('practice/partials/items.html', page=_search_page())
+
+
+@practice_bp.route('/questions/<module_id>/<question_id>/answer')
+@etag_cached(_browse_versions)
+def question_answer(module_id, question_id):
+    q = get_question(question_id, module_id)
+    if not q:
+        abort(404)
+    return render_template('practice/partials/answer.html',
+                           item_id=q.id, answer=q.answer, rubric=q.rubric)
+
+
+@practice_bp.route('/challenges/<challenge_id>/answer')
+@etag_cached(_browse_versions)
+def challenge_answer(challenge_id):
+    c = load_challenge(challenge_id)
+    if not c:
+        abort(404)
+    return render_template('practice/partials/answer.html',
+                           item_id=c['id'], answer=c['answer'], rubric=c.get('rubric', []))
+
+
+@practice_bp.route('/challenges/<challenge_id>/schema')
+@etag_cached(_browse_versions)
+def challenge_schema(challenge_id):
+    c = load_challenge(challenge_id)
+    if not c:
+        abort(404)
+    return render_template('practice/partials/schema.html', sql_setup=c.get('sql_setup', ''),
+                           tables=load_challenge_tables(challenge_id), sample_rows=SCHEMA_SAMPLE_ROWS)
+
+
+def _search_page():
+    try:
+        return search_index.search(request.args.get('search', ''),
+                                   category=request.args.get('category', ''),
+                                   q_type=request.args.get('type', ''),
+                                   source=SOURCE_FILTERS.get(request.args.get('source', ''), ''),
+                                   cursor=request.args.get('cursor') or None,
+                                   limit=PRACTICE_PAGE_SIZE)
+    except ValueError:
+        abort(400)
+
+
 @practice_bp.route('/sql-run', methods=['POST'])
 def sql_run():
     data = request.get_json()
@@ -97,13 +94,19 @@ def sql_run():
     reference_sql = challenge.get('sql_answer', '')
     expected_rows = challenge.get('expected_rows')
     expected_columns = challenge.get('expected_columns')
+    tables = load_challenge_tables(challenge_id)
+    cases = load_challenge_cases(challenge_id)
 
+    from app.sql_runner import execute_and_compare  # sqlite3 loads on first run
     result = execute_and_compare(
         setup_sql=setup_sql,
         user_sql=user_sql,
         reference_sql=reference_sql,
         expected_rows=expected_rows,
         expected_columns=expected_columns,
+        tables=tables,
+        cases=cases,
+        cache_key=content_hash(challenge_id),
     )
 
     return jsonify(result)
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, redirect, url_for
-from app.storage.progress_store import get_progress, flush, reset_module_questions
+from app.storage.progress_store import locked, reset_module_questions
 from app.storage.question_store import load_questions
 
 progress_bp = Blueprint('progress', __name__)
@@ -15,10 +15,12 @@ def reset_module(module_id):
 
 @progress_bp.route('/api/progress/stats')
 def progress_stats():
-    p = get_progress()
-    return jsonify({
-        'daily_streak': p.daily_streak,
-        'total_attempted': p.total_attempted,
-        'total_correct': p.total_correct,
-        'due_for_review': len(p.due_for_review()),
-    })
+    with locked() as p:
+        return jsonify({
+            'daily_streak': p.daily_streak,
+            'total_attempted': p.total_attempted,
+            'total_correct': p.total_correct,
+            'due_for_review': p.due_count(),
+            'modules': p.module_summaries(),
+            'categories': p.category_summaries(),
+        })
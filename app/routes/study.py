@@ -1,9 +1,10 @@
 import re
-import markdown
 from flask import Blueprint, render_template, abort
-from app.storage.module_store import load_module
-from app.storage.question_store import load_questions
-from app.storage.progress_store import get_progress, flush
+from app.storage.module_store import load_module, module_version
+from app.storage.question_store import load_questions, questions_version
+from app.storage.progress_store import locked, updating, version as progress_version
+from app.http_cache import etag_cached, content_etag, not_modified, with_etag
+from app.timing import span
 
 study_bp = Blueprint('study', __name__)
 
@@ -26,20 +27,29 @@ def _strip_self_test_answers(text):
     ).strip()
 
 
+def _content_versions(module_id):
+    return module_version(module_id), questions_version(module_id)
+
+
+def _overview_versions(module_id):
+    return _content_versions(module_id) + (progress_version(),)
+
+
 @study_bp.route('/module/<module_id>')
+@etag_cached(_overview_versions)
 def module_overview(module_id):
     module = load_module(module_id)
     if not module:
         abort(404)
     questions = load_questions(module_id)
-    progress = get_progress()
-    mp = progress.get_module_progress(module_id)
-    mp.total_sections = len(module.sections)
-    return render_template('study/overview.html',
-                           module=module,
-                           questions=questions,
-                           progress=mp,
-                           user_progress=progress)
+    with locked() as progress:
+        mp = progress.get_module_progress(module_id)
+        mp.total_sections = len(module.sections)
+        return render_template('study/overview.html',
+                               module=module,
+                               questions=questions,
+                               progress=mp,
+                               user_progress=progress)
 
 
 @study_bp.route('/module/<module_id>/section/<int:section_idx>')
@@ -52,20 +62,28 @@ def section_view(module_id, section_idx):
     questions = [q for q in load_questions(module_id) if q.section_title == section.title]
 
     # Mark section as viewed
-    progress = get_progress()
-    mp = progress.get_module_progress(module_id)
-    mp.total_sections = len(module.sections)
-    if section_idx not in mp.sections_viewed:
-        mp.sections_viewed.append(section_idx)
-    if mp.status == 'not_started':
-        mp.status = 'in_progress'
-    if len(mp.sections_viewed) >= len(module.sections):
-        mp.status = 'completed'
-    progress.update_streak()
-    flush()
+    with updating() as progress:
+        mp = progress.get_module_progress(module_id)
+        mp.total_sections = len(module.sections)
+        if section_idx not in mp.sections_viewed:
+            mp.sections_viewed.append(section_idx)
+        if mp.status == 'not_started':
+            mp.status = 'in_progress'
+        if len(mp.sections_viewed) >= len(module.sections):
+            mp.status = 'completed'
+        progress.update_streak()
+
+    # The page itself doesn't show progress, so only content versions matter;
+    # the view above is still recorded when we answer 304.
+    etag = content_etag(*_content_versions(module_id))
+    response = not_modified(etag)
+    if response is not None:
+        return response
 
     is_self_test = 'self-test' in section.title.lower() or 'self test' in section.title.lower()
 
+    import markdown  # deferred until a page needs it
+
     # Convert text blocks to HTML, stripping quiz content that's already
     # shown as interactive Practice Questions below
     rendered_blocks = []
@@ -89,7 +107,8 @@ def section_view(module_id, section_idx):
                 text = cleaned
 
             if text:
-                html = markdown.markdown(text, extensions=['tables', 'fenced_code'])
+                with span('markdown'):
+                    html = markdown.markdown(text, extensions=['tables', 'fenced_code'])
                 rendered_blocks.append({'type': 'html', 'content': html})
         elif block.type == 'code':
             rendered_blocks.append({'type': 'code', 'content': block.content, 'language': block.language or ''})
@@ -97,27 +116,30 @@ def section_view(module_id, section_idx):
     prev_idx = section_idx - 1 if section_idx > 0 else None
     next_idx = section_idx + 1 if section_idx < len(module.sections) - 1 else None
 
-    return render_template('study/section.html',
-                           module=module,
-                           section=section,
-                           section_idx=section_idx,
-                           blocks=rendered_blocks,
-                           questions=questions,
-                           prev_idx=prev_idx,
-                           next_idx=next_idx)
+    return with_etag(render_template('study/section.html',
+                                     module=module,
+                                     section=section,
+                                     section_idx=section_idx,
+                                     blocks=rendered_blocks,
+                                     questions=questions,
+                                     prev_idx=prev_idx,
+                                     next_idx=next_idx), etag)
 
 
 @study_bp.route('/module/<module_id>/flashcards')
+@etag_cached(_content_versions)
 def flashcards(module_id):
     module = load_module(module_id)
     if not module:
         abort(404)
     questions = load_questions(module_id)
+    import markdown
     # Pre-render markdown for front/back so JS can use innerHTML
-    cards = [{'id': q.id,
-              'front': markdown.markdown(q.prompt, extensions=['fenced_code']),
-              'back': markdown.markdown(q.answer, extensions=['fenced_code']),
-              'category': q.category, 'type': q.question_type} for q in questions]
+    with span('markdown'):
+        cards = [{'id': q.id,
+                  'front': markdown.markdown(q.prompt, extensions=['fenced_code']),
+                  'back': markdown.markdown(q.answer, extensions=['fenced_code']),
+                  'category': q.category, 'type': q.question_type} for q in questions]
     return render_template('study/flashcard.html',
                            module=module,
                            cards=cards)
@@ -1,14 +1,57 @@
+import hashlib
+import json
+import os
 import sqlite3
-import signal
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.config import SQL_CASE_WORKERS, SQL_RESULT_CACHE
+from app.metrics import SQL_SECONDS
+from app.storage.cache import LRUCache
+from app.storage.table_files import quote_identifier
+from app.timing import timed
 
 
-class TimeoutError(Exception):
-    pass
+QUERY_TIMEOUT = 2  # seconds for each run of the user's query
+TIMEOUT_MESSAGE = 'Query timed out (2 second limit)'
+CANCELLED = 'cancelled'  # error of a test case stopped early; reported as skipped
+# SQLite VM instructions between checks for a timeout or cancellation
+PROGRESS_OPS = 10000
 
+# Hidden test cases run here. sqlite3 releases the GIL while SQLite works,
+# so the cases of one submission really do run in parallel.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
 
-def _timeout_handler(signum, frame):
-    raise TimeoutError("Query execution timed out")
+# (cache_key, SHA-256 of normalized user SQL) -> (user SQL as run, result)
+_results = LRUCache('sql_results', **SQL_RESULT_CACHE)
+
+SQL_KEYWORDS = frozenset('''
+    ABORT ACTION ADD AFTER ALL ALTER ALWAYS ANALYZE AND AS ASC ATTACH AUTOINCREMENT BEFORE BEGIN
+    BETWEEN BY CASCADE CASE CAST CHECK COLLATE COLUMN COMMIT CONFLICT CONSTRAINT CREATE CROSS
+    CURRENT CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DATABASE DEFAULT DEFERRABLE DEFERRED
+    DELETE DESC DETACH DISTINCT DO DROP EACH ELSE END ESCAPE EXCEPT EXCLUDE EXCLUSIVE EXISTS
+    EXPLAIN FAIL FILTER FIRST FOLLOWING FOR FOREIGN FROM FULL GENERATED GLOB GROUP GROUPS HAVING
+    IF IGNORE IMMEDIATE IN INDEX INDEXED INITIALLY INNER INSERT INSTEAD INTERSECT INTO IS ISNULL
+    JOIN KEY LAST LEFT LIKE LIMIT MATCH MATERIALIZED NATURAL NO NOT NOTHING NOTNULL NULL NULLS OF
+    OFFSET ON OR ORDER OTHERS OUTER OVER PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY RAISE RANGE
+    RECURSIVE REFERENCES REGEXP REINDEX RELEASE RENAME REPLACE RESTRICT RETURNING RIGHT ROLLBACK
+    ROW ROWS SAVEPOINT SELECT SET TABLE TEMP TEMPORARY THEN TIES TO TRANSACTION TRIGGER UNBOUNDED
+    UNION UNIQUE UPDATE USING VACUUM VALUES VIEW VIRTUAL WHEN WHERE WINDOW WITH WITHOUT
+'''.split())
+
+# Literals and quoted identifiers (possibly unterminated, as typed), comments,
+# whitespace, bare words, runs of anything else
+_SQL_TOKEN_RE = re.compile(r"""
+    (?P<quoted>'(?:[^']|'')*'?|"(?:[^"]|"")*"?|`[^`]*`?|\[[^\]]*\]?)
+  | (?P<space>--[^\n]*|/\*.*?(?:\*/|\Z)|\s+)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<other>[^'"`\[\sA-Za-z_/-]+|.)
+""", re.VERBOSE | re.DOTALL)
+_CALL_RE = re.compile(r'\s*\(')
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_$]*')
 
 
 def _is_select_only(sql):
@@ -26,14 +69,149 @@ def _is_select_only(sql):
     return True
 
 
-def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None, expected_columns=None):
+def normalize_sql(sql: str) -> str:
+    """sql with comments removed, whitespace collapsed to single spaces,
+    keywords and function names uppercased and trailing semicolons dropped.
+    Literals and quoted identifiers are kept as written."""
+    out = []
+    for m in _SQL_TOKEN_RE.finditer(sql):
+        kind, text = m.lastgroup, m.group()
+        if kind == 'space':
+            if out and out[-1] != ' ':
+                out.append(' ')
+        elif kind == 'word' and (text.upper() in SQL_KEYWORDS or _CALL_RE.match(sql, m.end())):
+            out.append(text.upper())
+        else:
+            out.append(text)
+    normalized = ''.join(out).strip()
+    while normalized.endswith(';'):
+        normalized = normalized[:-1].rstrip()
+    return normalized
+
+
+@timed('sql')
+def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None, expected_columns=None,
+                        tables=(), cases=(), cache_key=None):
     """
-    Run user SQL against an in-memory SQLite DB set up with setup_sql.
+    Run user SQL against an in-memory SQLite DB set up with setup_sql and
+    then filled from tables (TableData, see app/storage/table_files.py).
     Compare results against reference_sql output (or expected_rows).
 
+    cases (ChallengeCase) are further datasets, checked against
+    reference_sql's output on each. They run on SQL_CASE_WORKERS threads
+    alongside the main dataset, and the first to fail cancels the rest.
+    The result then has 'cases': a pass/fail summary per dataset, the main
+    one first, and is_correct only if all of them passed.
+
+    With a cache_key (which must change whenever any of the other arguments
+    do, e.g. challenge_store.content_hash), the result is cached under
+    (cache_key, normalized SQL), so resubmitting a query that differs only
+    in comments, spacing or keyword or function name case is answered
+    without running it. The SQL always runs as submitted: SQLite labels an
+    unaliased column with its expression's text, so a cached result is only
+    reused for different text when every column label is a name that text
+    also uses. Timeouts aren't cached.
+
     Returns dict with user results, expected results, and comparison info.
+    Cached results are shared; don't modify them.
     """
-    result = {
+    args = (setup_sql, user_sql, reference_sql, expected_rows, expected_columns, tables, cases)
+    if cache_key is None:
+        return _run(*args)
+    key = (cache_key, hashlib.sha256(normalize_sql(user_sql).encode('utf-8')).hexdigest())
+    entry = _results.get(key)
+    if entry is not None and _same_labels(entry, user_sql):
+        return entry[1]
+    result = _run(*args)
+    if not _timed_out(result):
+        _results.put(key, (user_sql, result), size=len(json.dumps((user_sql, result), default=str)))
+    return result
+
+
+def _same_labels(entry, user_sql):
+    """Whether the cached (sql, result) would get the same column labels
+    if user_sql, which normalizes the same, were run instead."""
+    cached_sql, result = entry
+    if cached_sql == user_sql:
+        return True
+    names = set(_IDENTIFIER_RE.findall(user_sql))
+    return all(_IDENTIFIER_RE.fullmatch(c) and c in names for c in result['user_columns'])
+
+
+def _run(*args):
+    start = time.perf_counter()
+    result = _execute_and_compare(*args)
+    SQL_SECONDS.observe(time.perf_counter() - start, outcome=_outcome(result))
+    return result
+
+
+def _timed_out(result):
+    return (result['error'] == TIMEOUT_MESSAGE
+            or any(c['status'] == 'timeout' for c in result.get('cases', ())))
+
+
+def _outcome(result):
+    if _timed_out(result):
+        return 'timeout'
+    if result['error']:
+        return 'error'
+    return 'correct' if result['is_correct'] else 'incorrect'
+
+
+def load_tables(conn, tables):
+    """Bulk-insert table data in one transaction, creating any table the
+    setup script didn't from its declared columns."""
+    with conn:
+        conn.execute('BEGIN')
+        for t in tables:
+            name = quote_identifier(t.table)
+            columns = [quote_identifier(c) for c in t.columns]
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {name} ('
+                         + ', '.join(f'{c} {decl}' for c, decl in zip(columns, t.columns.values())) + ')')
+            conn.executemany(f'INSERT INTO {name} ({", ".join(columns)}) '
+                             f'VALUES ({", ".join("?" * len(columns))})', t.rows)
+
+
+def _execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows, expected_columns, tables,
+                         cases):
+    result = _new_result(expected_rows, expected_columns)
+
+    user_sql = user_sql.strip()
+    if not user_sql:
+        result['error'] = 'No SQL provided'
+        return result
+
+    if not _is_select_only(user_sql):
+        result['error'] = 'Only SELECT statements are allowed'
+        return result
+
+    if not cases or not reference_sql:
+        _evaluate(result, setup_sql, tables, user_sql, reference_sql, threading.Event())
+        return result
+
+    # Hidden cases run on the pool while this thread runs the visible one;
+    # the first case to fail cancels the rest
+    cancel = threading.Event()
+    runs = []
+    for case in cases:
+        case_result = _new_result(None, None)
+        future = _executor().submit(_evaluate, case_result, case.setup_sql, case.tables, user_sql,
+                                    reference_sql, cancel)
+        future.add_done_callback(lambda f, r=case_result: _passed(r) or cancel.set())
+        runs.append((case, case_result, future))
+    _evaluate(result, setup_sql, tables, user_sql, reference_sql, threading.Event())
+    if not _passed(result):
+        cancel.set()
+    wait([future for _, _, future in runs])
+
+    result['cases'] = [_case_summary('example data', result)]
+    result['cases'] += [_case_summary(case.name, case_result) for case, case_result, _ in runs]
+    result['is_correct'] = all(c['status'] == 'passed' for c in result['cases'])
+    return result
+
+
+def _new_result(expected_rows, expected_columns):
+    return {
         'user_columns': [],
         'user_rows': [],
         'expected_columns': expected_columns or [],
@@ -44,22 +222,73 @@ def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None,
         'column_match': False,
     }
 
-    user_sql = user_sql.strip()
-    if not user_sql:
-        result['error'] = 'No SQL provided'
-        return result
 
-    if not _is_select_only(user_sql):
-        result['error'] = 'Only SELECT statements are allowed'
-        return result
+def _passed(result):
+    return result['is_correct'] and not result['error']
 
+
+def _case_summary(name, result):
+    """Pass/fail for one dataset, without its rows."""
+    if result['error'] == CANCELLED:
+        return {'name': name, 'status': 'skipped', 'message': 'not run: another case failed first'}
+    if result['error'] == TIMEOUT_MESSAGE:
+        return {'name': name, 'status': 'timeout', 'message': TIMEOUT_MESSAGE}
+    if result['error']:
+        return {'name': name, 'status': 'error', 'message': result['error']}
+    if result['is_correct']:
+        return {'name': name, 'status': 'passed', 'message': ''}
+    if not result['column_match']:
+        message = 'columns differ from the expected ones'
+    elif not result['row_count_match']:
+        message = f"expected {len(result['expected_rows'])} rows, got {len(result['user_rows'])}"
+    else:
+        message = 'row values differ'
+    return {'name': name, 'status': 'failed', 'message': message}
+
+
+def _executor():
+    # Started lazily so a forked worker never inherits the pool's threads
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(SQL_CASE_WORKERS, thread_name_prefix='sql-case')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+class _Interrupter:
+    """SQLite progress handler: stops the running statement once cancel is
+    set or the deadline (if any) has passed."""
+
+    def __init__(self, cancel):
+        self.cancel = cancel
+        self.deadline = None
+
+    def __call__(self):
+        return self.cancel.is_set() or (self.deadline is not None and time.monotonic() > self.deadline)
+
+    def reason(self):
+        return CANCELLED if self.cancel.is_set() else TIMEOUT_MESSAGE
+
+
+def _evaluate(result, setup_sql, tables, user_sql, reference_sql, cancel):
+    """Run one dataset: setup, the reference query (if any) for the expected
+    output, then user_sql, and fill in result."""
+    if cancel.is_set():
+        result['error'] = CANCELLED
+        return
+    interrupter = _Interrupter(cancel)
     conn = None
     try:
         conn = sqlite3.connect(':memory:')
         conn.execute("PRAGMA journal_mode=OFF")
+        conn.set_progress_handler(interrupter, PROGRESS_OPS)
 
         # run setup
         conn.executescript(setup_sql)
+        if tables:
+            load_tables(conn, tables)
 
         # run reference query to get expected output if we have one
         if reference_sql:
@@ -70,17 +299,11 @@ def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None,
                 result['expected_columns'] = ref_columns
                 result['expected_rows'] = [list(row) for row in ref_rows]
             except Exception as e:
-                result['error'] = f'Reference query error: {str(e)}'
-                return result
-
-        # set timeout for user query
-        old_handler = None
-        try:
-            old_handler = signal.signal(signal.SIGALRM, _timeout_handler)
-            signal.alarm(2)
-        except (ValueError, AttributeError):
-            pass
+                result['error'] = CANCELLED if cancel.is_set() else f'Reference query error: {str(e)}'
+                return
 
+        # the user query gets QUERY_TIMEOUT seconds
+        interrupter.deadline = time.monotonic() + QUERY_TIMEOUT
         try:
             cursor = conn.execute(user_sql)
             user_columns = [desc[0] for desc in cursor.description]
@@ -92,19 +315,14 @@ def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None,
 
             result['user_columns'] = user_columns
             result['user_rows'] = [list(row) for row in user_rows]
-        except TimeoutError:
-            result['error'] = 'Query timed out (2 second limit)'
-            return result
+        except sqlite3.OperationalError as e:
+            result['error'] = interrupter.reason() if interrupter() else str(e)
+            return
         except Exception as e:
             result['error'] = str(e)
-            return result
+            return
         finally:
-            try:
-                signal.alarm(0)
-                if old_handler is not None:
-                    signal.signal(signal.SIGALRM, old_handler)
-            except (ValueError, AttributeError):
-                pass
+            interrupter.deadline = None
 
         # compare results
         exp_cols = [c.lower() for c in result['expected_columns']]
@@ -118,13 +336,11 @@ def execute_and_compare(setup_sql, user_sql, reference_sql, expected_rows=None,
         result['is_correct'] = result['column_match'] and _rows_match(exp_rows_normalized, usr_rows_normalized)
 
     except Exception as e:
-        result['error'] = str(e)
+        result['error'] = CANCELLED if cancel.is_set() else str(e)
     finally:
         if conn:
             conn.close()
 
-    return result
-
 
 def _normalize_rows(rows):
     """Normalize row values for comparison: round floats, stringify."""
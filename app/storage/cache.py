@@ -0,0 +1,145 @@
+"""
+Bounded LRU cache shared by the module, question and challenge stores.
+
+Each entry keeps the loaded value, the version token of the file it came
+from and its approximate size in bytes (the stores use the file's size on
+disk: parsed objects take a few times more, but in proportion). Adding an
+entry evicts the least recently used ones until the cache is within
+max_entries and max_bytes; either may be None for no limit. A single entry
+larger than max_bytes is still kept until the next one arrives.
+
+Invalidation hooks run whenever a key's entry leaves the cache or is
+replaced (eviction, invalidate(), put() over it, clear()), so a store can
+drop whatever it derived from that entry. Hooks are called with the key, or
+None for clear(), after the cache's lock is released.
+
+Hits and misses are counted per cache and in the store_cache_* metrics.
+"""
+
+import threading
+from collections import OrderedDict
+from app.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS
+
+_caches = {}  # name -> LRUCache, for stats()
+
+
+class LRUCache:
+    def __init__(self, name: str, max_entries=None, max_bytes=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, version, size), least recently used first
+        self._bytes = 0
+        self._hooks = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+
+    def on_invalidate(self, hook):
+        """Call hook(key) whenever key's entry is dropped or replaced."""
+        self._hooks.append(hook)
+        return hook
+
+    def get_entry(self, key):
+        """(value, version) for key, marking it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            CACHE_MISSES.inc(store=self.name)
+            return None
+        CACHE_HITS.inc(store=self.name)
+        return entry[0], entry[1]
+
+    def get(self, key, default=None):
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def version(self, key):
+        """Version token of key's entry, without counting a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def versions(self) -> list:
+        """[(key, version)] of every entry, for refresh checks."""
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._entries.items()]
+
+    def put(self, key, value, version=None, size: int = 0):
+        dropped = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+                dropped.append(key)
+            self._entries[key] = (value, version, size)
+            self._bytes += size
+            evicted = 0
+            while len(self._entries) > 1 and self._over_limit():
+                oldest, entry = self._entries.popitem(last=False)
+                self._bytes -= entry[2]
+                dropped.append(oldest)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted, store=self.name)
+        self._run_hooks(dropped)
+
+    def _over_limit(self) -> bool:
+        return ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+        # Hooks run even if the entry was already gone: derived data may
+        # outlive it
+        self._run_hooks([key])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        self._run_hooks([None])
+
+    def _run_hooks(self, keys):
+        for key in keys:
+            for hook in self._hooks:
+                hook(key)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+        }
+
+
+def stats() -> dict:
+    """stats() of every cache, by name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
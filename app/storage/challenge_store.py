@@ -1,22 +1,147 @@
+import hashlib
 import json
 import os
-from app.config import DATA_CHALLENGES_DIR
+from app.config import DATA_CHALLENGES_DIR, STORE_CACHE_LIMITS
+from app.models.challenge import ChallengeCase
+from app.storage.cache import LRUCache
+from app.storage.table_files import read_table
+from app.storage.versions import file_version
+from app.timing import timed
 
-_cache = {}
+_cache = LRUCache('challenges', **STORE_CACHE_LIMITS['challenges'])
+# challenge_id -> [[TableData] per dataset]: the challenge's own sql_data, then
+# each test case's
+_data_cache = LRUCache('challenge_data', **STORE_CACHE_LIMITS['challenge_data'])
+_hashes = {}  # challenge_id -> content_hash(), dropped with its data entry
 
 
+@_cache.on_invalidate
+def _drop_data(challenge_id):
+    if challenge_id is None:
+        _data_cache.clear()
+    else:
+        _data_cache.invalidate(challenge_id)
+
+
+@_data_cache.on_invalidate
+def _drop_hash(challenge_id):
+    if challenge_id is None:
+        _hashes.clear()
+    else:
+        _hashes.pop(challenge_id, None)
+
+
+@timed('storage')
 def load_challenge(challenge_id):
-    if challenge_id in _cache:
-        return _cache[challenge_id]
+    entry = _load(challenge_id)
+    return entry[0] if entry else None
+
+
+def _load(challenge_id):
+    """(challenge, version), from the cache or disk, or None."""
+    entry = _cache.get_entry(challenge_id)
+    if entry is not None:
+        return entry
     path = os.path.join(DATA_CHALLENGES_DIR, f'{challenge_id}.json')
     if not os.path.exists(path):
         return None
+    version, size = file_version(path), os.path.getsize(path)
     with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    _cache[challenge_id] = data
-    return data
+    _cache.put(challenge_id, data, version, size)
+    return data, version
+
+
+@timed('storage')
+def load_challenge_tables(challenge_id) -> list:
+    """The challenge's sql_data tables as TableData, rows converted to
+    their declared types; [] if it has none."""
+    datasets = _load_datasets(challenge_id)
+    return datasets[0] if datasets else []
+
+
+@timed('storage')
+def load_challenge_cases(challenge_id) -> list:
+    """The challenge's hidden test cases as ChallengeCase.
+
+    A challenge may list datasets beyond the visible one under "test_cases",
+    each {"name", "sql_setup", "sql_data" (optional, loaded after the
+    setup)}. A case without its own sql_setup starts from the challenge's
+    whole dataset, its sql_setup and then its sql_data, and the case's
+    sql_data is loaded on top. Submissions are checked against every case
+    with the reference query's output as the expected result.
+    """
+    challenge = load_challenge(challenge_id)
+    if not challenge or not challenge.get('test_cases'):
+        return []
+    return challenge_cases(challenge, _load_datasets(challenge_id))
+
+
+def challenge_cases(challenge, datasets) -> list:
+    """ChallengeCase for each of challenge's test_cases, given [[TableData]]
+    for its own sql_data and then each case's (see load_challenge_cases)."""
+    cases = []
+    for i, (case, tables) in enumerate(zip(challenge.get('test_cases', []), datasets[1:])):
+        if 'sql_setup' not in case:
+            tables = datasets[0] + tables
+        cases.append(ChallengeCase(name=case.get('name') or f'case {i + 1}',
+                                   setup_sql=case.get('sql_setup', challenge.get('sql_setup', '')),
+                                   tables=tables))
+    return cases
+
+
+def _data_specs(challenge) -> list:
+    """sql_data lists of the challenge and then of each test case."""
+    return [challenge.get('sql_data', [])] + [case.get('sql_data', []) for case in challenge.get('test_cases', [])]
+
+
+def _load_datasets(challenge_id) -> list:
+    """[[TableData]] for the challenge's own sql_data and then each test
+    case's; [] if the challenge doesn't exist."""
+    challenge = load_challenge(challenge_id)
+    if not challenge:
+        return []
+    spec_lists = _data_specs(challenge)
+    if not any(spec_lists):
+        return [[] for _ in spec_lists]
+    entry = _data_cache.get_entry(challenge_id)
+    if entry is not None:
+        return entry[0]
+    paths = _data_paths(spec_lists)
+    version = _data_version(paths)
+    datasets = [[read_table(os.path.join(DATA_CHALLENGES_DIR, spec['file']), spec['table'], spec['columns'])
+                 for spec in specs]
+                for specs in spec_lists]
+    _data_cache.put(challenge_id, datasets, version, sum(os.path.getsize(p) for p in paths))
+    return datasets
 
 
+def content_hash(challenge_id):
+    """SHA-256 of the challenge's content and table data, or None if it
+    doesn't exist. Unlike the version tokens, equal content hashes equal
+    in every worker and across restarts."""
+    digest = _hashes.get(challenge_id)
+    if digest is None:
+        challenge = load_challenge(challenge_id)
+        if challenge is None:
+            return None
+        h = hashlib.sha256(json.dumps(challenge, sort_keys=True).encode('utf-8'))
+        for tables in _load_datasets(challenge_id):
+            for t in tables:
+                h.update(repr((t.table, t.columns, t.rows)).encode('utf-8'))
+        digest = _hashes[challenge_id] = h.hexdigest()
+    return digest
+
+
+def _data_paths(spec_lists) -> list:
+    return [os.path.join(DATA_CHALLENGES_DIR, spec['file']) for specs in spec_lists for spec in specs]
+
+
+def _data_version(paths) -> str:
+    return ','.join(file_version(p) for p in paths)
+
+
+@timed('storage')
 def load_all_challenges():
     os.makedirs(DATA_CHALLENGES_DIR, exist_ok=True)
     challenges = []
@@ -29,5 +154,62 @@ def load_all_challenges():
     return challenges
 
 
+def challenges_version() -> str:
+    """Combined version token of every challenge currently on disk,
+    including its table data files."""
+    os.makedirs(DATA_CHALLENGES_DIR, exist_ok=True)
+    tokens = []
+    for fname in sorted(os.listdir(DATA_CHALLENGES_DIR)):
+        if fname.endswith('.json'):
+            entry = _load(fname.replace('.json', ''))
+            if entry:
+                challenge, version = entry
+                paths = _data_paths(_data_specs(challenge))
+                if paths:
+                    version += '+' + _data_version(paths)
+                tokens.append(f"{challenge['id']}:{version}")
+    return ','.join(tokens)
+
+
+def refresh_cache() -> list:
+    """Reload cached challenges whose file changed on disk, dropping
+    deleted ones, and drop table data whose files changed; returns their
+    ids."""
+    changed = []
+    for challenge_id, version in _cache.versions():
+        path = os.path.join(DATA_CHALLENGES_DIR, f'{challenge_id}.json')
+        try:
+            current, size = file_version(path), os.path.getsize(path)
+            if current == version:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            _cache.invalidate(challenge_id)
+        else:
+            _cache.put(challenge_id, data, current, size)
+        changed.append(challenge_id)
+    # Data files of unchanged challenges; changed ones were dropped above
+    for challenge_id, version in _data_cache.versions():
+        challenge = load_challenge(challenge_id)
+        try:
+            if challenge and _data_version(_data_paths(_data_specs(challenge))) == version:
+                continue
+        except FileNotFoundError:
+            pass
+        _data_cache.invalidate(challenge_id)
+        if challenge_id not in changed:
+            changed.append(challenge_id)
+    return changed
+
+
+def cache_size() -> int:
+    return len(_cache)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
 def clear_cache():
     _cache.clear()
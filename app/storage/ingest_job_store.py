@@ -0,0 +1,203 @@
+"""
+In-memory queue of admin import jobs.
+
+/admin/ingest spools the pasted or uploaded markdown to a temporary file and
+submits a job; INGEST_JOB_WORKERS background threads parse it off the
+request thread, either into a preview (first ADMIN_PREVIEW_SECTIONS sections
+plus counts) or straight into the module and question stores. Jobs report
+byte progress as they go and check for cancellation between sections; a
+cancelled save leaves the stores untouched.
+
+Like quiz sessions, jobs live in the worker process that accepted them. The
+threads start on first submit, so they are never inherited across a fork.
+The newest INGEST_JOBS_KEPT finished jobs are kept for status polling.
+"""
+
+import io
+import logging
+import os
+import queue
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from app.config import ADMIN_PREVIEW_SECTIONS, INGEST_JOB_WORKERS, INGEST_JOBS_KEPT
+from app.models.ingest_job import IngestJob
+from app.storage.module_store import module_writer
+from app.storage.question_store import questions_writer
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_jobs = OrderedDict()  # job id -> IngestJob, oldest first
+_queue = queue.Queue()
+_workers_pid = None  # pid that started the worker threads
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def spool(source) -> str:
+    """Copy a str or binary file object to a temporary file; returns its path."""
+    fd, path = tempfile.mkstemp(prefix='ingest-', suffix='.md')
+    with os.fdopen(fd, 'wb') as f:
+        if isinstance(source, str):
+            f.write(source.encode('utf-8'))
+        else:
+            shutil.copyfileobj(source, f)
+    return path
+
+
+def submit_job(path: str, title: str, action: str = 'preview', filename: str = '') -> IngestJob:
+    """Queue a preview or save of the markdown spooled at path."""
+    now = time.time()
+    job = IngestJob(
+        id=secrets.token_urlsafe(6),
+        action=action,
+        title=title,
+        path=path,
+        filename=filename,
+        size=os.path.getsize(path),
+        created_at=now,
+    )
+    with _lock:
+        _jobs[job.id] = job
+        _evict()
+        _start_workers()
+    _queue.put(job.id)
+    return job
+
+
+def get_job(job_id: str):
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> list:
+    """Known jobs, newest first."""
+    with _lock:
+        return list(reversed(_jobs.values()))
+
+
+def cancel_job(job_id: str):
+    """Ask a job to stop. Queued jobs never start; running ones stop at the
+    next section. Returns the job, or None if unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel_requested = True
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+        return job
+
+
+def _start_workers():
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    _workers_pid = os.getpid()
+    for i in range(INGEST_JOB_WORKERS):
+        threading.Thread(target=_work, name=f'ingest-worker-{i}', daemon=True).start()
+
+
+def _work():
+    while True:
+        job_id = _queue.get()
+        with _lock:
+            job = _jobs.get(job_id)
+            if job is None or job.status != 'queued':
+                continue
+            job.status = 'running'
+            job.started_at = time.time()
+        try:
+            if job.action == 'save':
+                _save(job)
+            else:
+                _preview(job)
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            log.exception('Ingest job %s failed', job.id)
+            job.status = 'failed'
+            job.error = str(e) or e.__class__.__name__
+        job.finished_at = time.time()
+
+
+def _sections(job: IngestJob):
+    """Sections of the job's source, tracking progress and cancellation."""
+    # Parsers load with the first job, not with the admin blueprint
+    from app.parser.master_doc_parser import iter_sections
+    with open(job.path, 'rb') as raw:
+        stream = io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+        for section in iter_sections(stream):
+            if job.cancel_requested:
+                raise JobCancelled()
+            job.position = raw.tell()
+            job.sections += 1
+            yield section
+
+
+def _preview(job: IngestJob):
+    from app.parser.master_doc_parser import new_import_module
+    from app.parser.question_extractor import extract_from_section
+    module = new_import_module(job.title)
+    preview = {
+        'sections': [],
+        'questions': [],
+        'categories': Counter(),
+        'types': Counter(),
+    }
+    for section in _sections(job):
+        questions = extract_from_section(module.id, section)
+        job.questions += len(questions)
+        preview['categories'][section.category] += 1
+        preview['types'].update(q.question_type for q in questions)
+        if len(preview['sections']) < ADMIN_PREVIEW_SECTIONS:
+            preview['sections'].append(section)
+            preview['questions'].extend(questions)
+    job.module_id = module.id
+    job.preview = preview
+
+
+def _save(job: IngestJob):
+    from app.parser.master_doc_parser import new_import_module
+    from app.parser.question_extractor import extract_from_section
+    module = new_import_module(job.title)
+    # Sections and their questions are written as they are parsed
+    with module_writer(module) as write_section, questions_writer(module.id) as write_question:
+        for section in _sections(job):
+            write_section(section)
+            for q in extract_from_section(module.id, section):
+                write_question(q)
+                job.questions += 1
+    job.module_id = module.id
+
+
+def _evict():
+    finished = [job for job in _jobs.values() if not job.active]
+    for job in finished[:max(0, len(finished) - INGEST_JOBS_KEPT + 1)]:
+        del _jobs[job.id]
+        if not any(other.path == job.path for other in _jobs.values()):
+            _remove(job.path)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def clear():
+    with _lock:
+        for job in _jobs.values():
+            job.cancel_requested = True
+        paths = {job.path for job in _jobs.values()}
+        _jobs.clear()
+    for path in paths:
+        _remove(path)
@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+_PLACEHOLDER = '\x00items\x00'
+
+
+def temp_path(path: str) -> str:
+    """Temporary name to write path's new contents under before os.replace;
+    unique per process and thread, so concurrent writers never share one."""
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+@contextmanager
+def stream_json(path: str, document, key: str = None):
+    """Write a JSON file whose list (document[key], or document itself) is
+    filled in one item at a time.
+
+    Yields an append(item) function. Output matches json.dump(indent=2), is
+    written to a temporary file and only replaces path if the block exits
+    cleanly.
+    """
+    if key is None:
+        head, indent, tail = '', '', ''
+    else:
+        document = dict(document, **{key: _PLACEHOLDER})
+        text = json.dumps(document, indent=2, ensure_ascii=False)
+        marker = json.dumps(_PLACEHOLDER)
+        head, tail = text.split(marker, 1)
+        indent = head[head.rindex('\n') + 1:]
+        indent = indent[:len(indent) - len(indent.lstrip())]
+
+    tmp = temp_path(path)
+    count = 0
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(head + '[')
+
+        def append(item):
+            nonlocal count
+            body = json.dumps(item, indent=2, ensure_ascii=False)
+            prefix = indent + '  '
+            f.write(',\n' if count else '\n')
+            f.write('\n'.join(prefix + line for line in body.split('\n')))
+            count += 1
+
+        try:
+            yield append
+        except BaseException:
+            f.close()
+            os.remove(tmp)
+            raise
+        f.write(('\n' + indent + ']' if count else ']') + tail)
+    os.replace(tmp, path)
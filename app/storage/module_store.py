@@ -1,32 +1,94 @@
 import json
 import os
-from app.config import DATA_MODULES_DIR
-from app.models.module import Module
+from contextlib import contextmanager
+from app.config import DATA_MODULES_DIR, STORE_CACHE_LIMITS
+from app.models.module import Module, Section
+from app.storage.cache import LRUCache
+from app.storage.json_stream import stream_json, temp_path
+from app.storage.versions import file_version
+from app.timing import timed
 
-_cache = {}
+_cache = LRUCache('modules', **STORE_CACHE_LIMITS['modules'])
 
 
+@timed('storage')
 def save_module(module: Module):
     os.makedirs(DATA_MODULES_DIR, exist_ok=True)
     path = os.path.join(DATA_MODULES_DIR, f'{module.id}.json')
-    with open(path, 'w', encoding='utf-8') as f:
+    # Replace the file in one step; other workers may be reading it
+    tmp = temp_path(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(module.to_dict(), f, indent=2, ensure_ascii=False)
-    _cache[module.id] = module
+    os.replace(tmp, path)
+    _cache.put(module.id, module, file_version(path), os.path.getsize(path))
 
 
+@contextmanager
+def module_writer(module: Module):
+    """Save module, taking its sections one at a time from the yielded
+    write(section) function instead of from module.sections.
+
+    The module isn't cached afterwards; it loads from disk on next use.
+    """
+    os.makedirs(DATA_MODULES_DIR, exist_ok=True)
+    path = os.path.join(DATA_MODULES_DIR, f'{module.id}.json')
+    with stream_json(path, module.to_dict(), key='sections') as append:
+        def write(section: Section):
+            append(section.to_dict())
+        yield write
+    _cache.invalidate(module.id)
+
+
+@timed('storage')
 def load_module(module_id: str) -> Module:
-    if module_id in _cache:
-        return _cache[module_id]
+    entry = _load(module_id)
+    return entry[0] if entry else None
+
+
+def _load(module_id: str):
+    """(module, version), from the cache or disk, or None."""
+    entry = _cache.get_entry(module_id)
+    if entry is not None:
+        return entry
     path = os.path.join(DATA_MODULES_DIR, f'{module_id}.json')
     if not os.path.exists(path):
         return None
+    version, size = file_version(path), os.path.getsize(path)
     with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     module = Module.from_dict(data)
-    _cache[module_id] = module
-    return module
+    _cache.put(module_id, module, version, size)
+    return module, version
+
 
+def module_version(module_id: str):
+    """Version token of the cached module, or None if it doesn't exist."""
+    entry = _load(module_id)
+    return entry[1] if entry else None
 
+
+def refresh_cache() -> list:
+    """Reload cached modules whose file changed on disk, dropping deleted
+    ones; returns their ids. Each module is swapped in whole, so readers see
+    either the old or the new version."""
+    changed = []
+    for module_id, version in _cache.versions():
+        path = os.path.join(DATA_MODULES_DIR, f'{module_id}.json')
+        try:
+            current, size = file_version(path), os.path.getsize(path)
+            if current == version:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                module = Module.from_dict(json.load(f))
+        except FileNotFoundError:
+            _cache.invalidate(module_id)
+        else:
+            _cache.put(module_id, module, current, size)
+        changed.append(module_id)
+    return changed
+
+
+@timed('storage')
 def list_modules() -> list:
     os.makedirs(DATA_MODULES_DIR, exist_ok=True)
     modules = []
@@ -39,5 +101,13 @@ def list_modules() -> list:
     return modules
 
 
+def cache_size() -> int:
+    return len(_cache)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
 def clear_cache():
     _cache.clear()
@@ -1,62 +1,156 @@
+"""
+The learner's progress, shared by every request thread in the process.
+
+_lock guards the UserProgress and everything reachable from it. Views read
+it inside locked() and change it inside updating(), which writes it out
+afterwards. Only taking the snapshot happens under the lock; encoding and
+writing the JSON happen outside it, so a slow dump doesn't hold up other
+grades. Writes are atomic and coalesced: a writer always writes the
+newest snapshot, so writers queued behind it find their change already on
+disk and return without writing.
+"""
+
 import json
 import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
 from app.config import PROGRESS_FILE
+from app.metrics import FLUSH_SECONDS
 from app.models.progress import UserProgress
+from app.timing import timed
 
 _progress = None
+_lock = threading.RLock()
+_write_lock = threading.Lock()  # serializes writes to PROGRESS_FILE
+# Per-process token + flush counter; never equal across workers, so an ETag
+# built from it can't match another worker's (possibly different) state.
+_boot_id = secrets.token_hex(4)
+_version = 0
+_written_version = 0  # _version of the snapshot last written
+_pending = (0, None)  # newest (version, snapshot), set under _lock
 
 
+@timed('storage')
 def _load() -> UserProgress:
     global _progress
     if _progress is not None:
         return _progress
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        _progress = UserProgress.from_dict(data)
-    else:
-        _progress = UserProgress()
+    with _lock:
+        if _progress is not None:
+            return _progress
+        if os.path.exists(PROGRESS_FILE):
+            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            progress = UserProgress.from_dict(data)
+            _backfill_modules(progress)
+        else:
+            progress = UserProgress()
+        _progress = progress
     return _progress
 
 
+def _backfill_modules(p: UserProgress):
+    """Tag entries saved before QuestionProgress tracked its module/category."""
+    from app.storage.question_store import get_question
+    changed = False
+    for qp in p.questions.values():
+        if qp.module_id or qp.attempts == 0:
+            continue
+        q = get_question(qp.question_id)
+        if q is not None:
+            qp.module_id = q.module_id
+            qp.category = q.category
+            changed = True
+    if changed:
+        p.rebuild_stats()
+
+
 def get_progress() -> UserProgress:
+    """The shared progress object. With threaded workers, use locked() or
+    updating() instead of touching it directly."""
     return _load()
 
 
+@contextmanager
+def locked():
+    """Hold the progress lock while reading; yields the progress."""
+    with _lock:
+        yield _load()
+
+
+@contextmanager
+def updating():
+    """Hold the progress lock while changing it, then write it out."""
+    with _lock:
+        p = _load()
+        yield p
+        _snapshot(p)
+    _write()
+
+
+def version() -> str:
+    return f'{_boot_id}.{_version}'
+
+
 def flush():
-    p = _load()
-    os.makedirs(os.path.dirname(PROGRESS_FILE), exist_ok=True)
-    with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(p.to_dict(), f, indent=2, ensure_ascii=False)
+    with _lock:
+        _snapshot(_load())
+    _write()
+
+
+def _snapshot(p: UserProgress):
+    global _version, _pending
+    _version += 1
+    _pending = (_version, p.snapshot())
+
+
+@timed('flush')
+def _write():
+    global _written_version
+    start = time.perf_counter()
+    with _write_lock:
+        version, snapshot = _pending
+        if version <= _written_version:
+            return  # written by whoever held _write_lock before us
+        data = UserProgress.snapshot_dict(snapshot)
+        os.makedirs(os.path.dirname(PROGRESS_FILE), exist_ok=True)
+        # Per-process temp name: other workers may be writing too
+        tmp = f'{PROGRESS_FILE}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, PROGRESS_FILE)
+        _written_version = version
+    FLUSH_SECONDS.observe(time.perf_counter() - start)
 
 
 def reset_module(module_id: str):
-    p = _load()
-    if module_id in p.modules:
-        p.modules[module_id].status = 'not_started'
-        p.modules[module_id].sections_viewed = []
-    # Reset all questions for this module
-    to_remove = [qid for qid, qp in p.questions.items()
-                 if qid.startswith(module_id) or True]  # We'll filter by module in questions
-    # Actually we need to check by module - questions have module_id in their data
-    # For simplicity, just reset the module progress and keep question progress
-    # (questions are tracked by question_id, not module)
-    flush()
+    with updating() as p:
+        if module_id in p.modules:
+            p.modules[module_id].status = 'not_started'
+            p.modules[module_id].sections_viewed = []
+        # Reset all questions for this module
+        to_remove = [qid for qid, qp in p.questions.items()
+                     if qid.startswith(module_id) or True]  # We'll filter by module in questions
+        # Actually we need to check by module - questions have module_id in their data
+        # For simplicity, just reset the module progress and keep question progress
+        # (questions are tracked by question_id, not module)
 
 
 def reset_module_questions(module_id: str, question_ids: list):
     """Reset progress for specific question IDs belonging to a module."""
-    p = _load()
-    if module_id in p.modules:
-        p.modules[module_id].status = 'not_started'
-        p.modules[module_id].sections_viewed = []
-    for qid in question_ids:
-        if qid in p.questions:
-            del p.questions[qid]
-    flush()
+    with updating() as p:
+        if module_id in p.modules:
+            p.modules[module_id].status = 'not_started'
+            p.modules[module_id].sections_viewed = []
+        for qid in question_ids:
+            p.remove_question(qid)
 
 
 def reload():
-    global _progress
-    _progress = None
-    return _load()
+    global _progress, _version
+    with _lock:
+        _progress = None
+        _version += 1
+        return _load()
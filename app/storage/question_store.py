@@ -1,45 +1,202 @@
 import json
 import os
-from app.config import DATA_QUESTIONS_DIR
-from app.models.question import Question
+import random
+from contextlib import contextmanager
+from bisect import bisect_right
+from itertools import accumulate
+from app.config import DATA_QUESTIONS_DIR, STORE_CACHE_LIMITS
+from app.models.question import Question, dedupe_id
+from app.storage.cache import LRUCache
+from app.storage.json_stream import stream_json, temp_path
+from app.storage.versions import file_version
+from app.timing import timed
 
-_cache = {}
+_cache = LRUCache('questions', **STORE_CACHE_LIMITS['questions'])
+# Built on demand from a cached list and dropped with it. Each is stored
+# with the list it was built from, so one that lost a race with an eviction
+# or reload is rebuilt rather than used.
+_id_maps = {}  # module_id -> (questions, {question_id: Question})
+_filter_indexes = {}  # module_id -> (questions, {(category, question_type): tuple of ids})
 
 
+@_cache.on_invalidate
+def _drop_indexes(module_id):
+    if module_id is None:
+        _id_maps.clear()
+        _filter_indexes.clear()
+    else:
+        _id_maps.pop(module_id, None)
+        _filter_indexes.pop(module_id, None)
+
+
+@timed('storage')
 def save_questions(module_id: str, questions: list):
     os.makedirs(DATA_QUESTIONS_DIR, exist_ok=True)
     path = os.path.join(DATA_QUESTIONS_DIR, f'{module_id}.json')
     data = [q.to_dict() for q in questions]
-    with open(path, 'w', encoding='utf-8') as f:
+    # Replace the file in one step; other workers may be reading it
+    tmp = temp_path(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
-    _cache[module_id] = questions
+    os.replace(tmp, path)
+    _cache.put(module_id, questions, file_version(path), os.path.getsize(path))
+
 
+@contextmanager
+def questions_writer(module_id: str):
+    """Replace a module's questions, taking them one at a time from the
+    yielded write(question) function. Ids are deduped as they arrive.
+    """
+    os.makedirs(DATA_QUESTIONS_DIR, exist_ok=True)
+    path = os.path.join(DATA_QUESTIONS_DIR, f'{module_id}.json')
+    taken = set()
+    with stream_json(path, []) as append:
+        def write(question: Question):
+            append(dedupe_id(question, taken).to_dict())
+        yield write
+    _cache.invalidate(module_id)
 
+
+@timed('storage')
 def load_questions(module_id: str) -> list:
-    if module_id in _cache:
-        return _cache[module_id]
+    return _load(module_id)[0]
+
+
+def _load(module_id: str):
+    """(questions, version), from the cache or disk; ([], '0') if the
+    module has no questions file."""
+    entry = _cache.get_entry(module_id)
+    if entry is not None:
+        return entry
     path = os.path.join(DATA_QUESTIONS_DIR, f'{module_id}.json')
     if not os.path.exists(path):
-        return []
+        return [], '0'
+    version, size = file_version(path), os.path.getsize(path)
     with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     questions = [Question.from_dict(d) for d in data]
-    _cache[module_id] = questions
-    return questions
+    _cache.put(module_id, questions, version, size)
+    return questions, version
 
 
-def load_all_questions() -> list:
+def questions_version(module_id: str) -> str:
+    """Version token of a module's cached questions ('0' if it has none)."""
+    return _load(module_id)[1]
+
+
+def all_questions_version() -> str:
+    return ','.join(f'{mid}:{questions_version(mid)}' for mid in list_question_modules())
+
+
+def refresh_cache() -> list:
+    """Reload cached question lists whose file changed on disk, dropping
+    deleted ones; returns their module ids. Each list is swapped in whole,
+    so readers see either the old or the new set."""
+    changed = []
+    for module_id, version in _cache.versions():
+        path = os.path.join(DATA_QUESTIONS_DIR, f'{module_id}.json')
+        try:
+            current, size = file_version(path), os.path.getsize(path)
+            if current == version:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                questions = [Question.from_dict(d) for d in json.load(f)]
+        except FileNotFoundError:
+            _cache.invalidate(module_id)
+        else:
+            _cache.put(module_id, questions, current, size)
+        changed.append(module_id)
+    return changed
+
+
+def list_question_modules() -> list:
+    """Ids of every module that has a questions file, sorted."""
     os.makedirs(DATA_QUESTIONS_DIR, exist_ok=True)
+    return [fname.replace('.json', '') for fname in sorted(os.listdir(DATA_QUESTIONS_DIR))
+            if fname.endswith('.json')]
+
+
+@timed('storage')
+def load_all_questions() -> list:
     all_q = []
-    for fname in sorted(os.listdir(DATA_QUESTIONS_DIR)):
-        if fname.endswith('.json'):
-            module_id = fname.replace('.json', '')
-            all_q.extend(load_questions(module_id))
+    for module_id in list_question_modules():
+        all_q.extend(load_questions(module_id))
     return all_q
 
 
+@timed('storage')
+def get_question(question_id: str, module_id: str = ''):
+    """Look up a question by id, searching only module_id when given."""
+    for mid in ([module_id] if module_id else list_question_modules()):
+        id_map = _id_map(mid)
+        if question_id in id_map:
+            return id_map[question_id]
+    return None
+
+
+def _id_map(module_id: str) -> dict:
+    questions = load_questions(module_id)
+    built = _id_maps.get(module_id)
+    if built is None or built[0] is not questions:
+        built = _id_maps[module_id] = (questions, {q.id: q for q in questions})
+    return built[1]
+
+
+def build_indexes() -> int:
+    """Load every module's questions and build its lookup indexes now
+    rather than on first use; returns the number of questions."""
+    total = 0
+    for module_id in list_question_modules():
+        total += len(_id_map(module_id))
+        _filter_index(module_id)
+    return total
+
+
+def _filter_index(module_id: str) -> dict:
+    questions = load_questions(module_id)
+    built = _filter_indexes.get(module_id)
+    if built is None or built[0] is not questions:
+        buckets = {}
+        for q in questions:
+            buckets.setdefault((q.category, q.question_type), []).append(q.id)
+        built = _filter_indexes[module_id] = (questions, {k: tuple(v) for k, v in buckets.items()})
+    return built[1]
+
+
+@timed('storage')
+def select_questions(module_id: str = '', categories=(), types=(), count: int = 10,
+                     rng=random) -> list:
+    """Randomly pick up to count question ids matching the filters.
+
+    Matching (module, category, type) buckets are read from the filter index
+    and sampled by position, so the cost scales with count and the number of
+    buckets rather than the bank size. Buckets are tuples; cached question
+    lists are never reordered.
+    """
+    categories = set(categories)
+    types = set(types)
+    buckets = []
+    for mid in ([module_id] if module_id else list_question_modules()):
+        for (category, q_type), ids in _filter_index(mid).items():
+            if categories and category not in categories:
+                continue
+            if types and q_type not in types:
+                continue
+            buckets.append(ids)
+
+    ends = list(accumulate(len(ids) for ids in buckets))
+    total = ends[-1] if ends else 0
+    selected = []
+    for pos in rng.sample(range(total), min(max(count, 0), total)):
+        b = bisect_right(ends, pos)
+        start = ends[b - 1] if b else 0
+        selected.append(buckets[b][pos - start])
+    return selected
+
+
 def add_question(question: Question):
     questions = load_questions(question.module_id)
+    dedupe_id(question, {q.id for q in questions})
     questions.append(question)
     save_questions(question.module_id, questions)
 
@@ -57,7 +214,14 @@ def delete_question(module_id: str, question_id: str):
     questions = load_questions(module_id)
     questions = [q for q in questions if q.id != question_id]
     save_questions(module_id, questions)
-    _cache[module_id] = questions
+
+
+def cache_size() -> int:
+    return len(_cache)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
 
 
 def clear_cache():
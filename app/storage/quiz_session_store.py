@@ -0,0 +1,78 @@
+"""
+In-memory store for running quizzes.
+
+A session maps a short token to the ordered question ids, filters and start
+time, so HTMX forms only round-trip the token and a cursor. Sessions expire
+after QUIZ_SESSION_TTL idle seconds and the store never holds more than
+QUIZ_SESSION_MAX of them; both are enforced lazily on access.
+
+Sessions live in this process only. Under gunicorn with several workers a
+quiz started in one worker is unknown to the others, so run a single worker
+or route each client to the same one (sticky sessions).
+"""
+
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from app.config import QUIZ_SESSION_TTL, QUIZ_SESSION_MAX
+from app.models.quiz_session import QuizSession
+
+# token -> QuizSession, least recently used first
+_sessions = OrderedDict()
+_lock = threading.Lock()
+
+
+def create_session(question_ids, module_id='', categories=(), types=()) -> QuizSession:
+    now = time.time()
+    session = QuizSession(
+        token='',
+        question_ids=tuple(sys.intern(qid) for qid in question_ids),
+        module_id=module_id,
+        categories=tuple(categories),
+        types=tuple(types),
+        started_at=now,
+        touched_at=now,
+    )
+    with _lock:
+        _evict(now)
+        token = secrets.token_urlsafe(6)
+        while token in _sessions:
+            token = secrets.token_urlsafe(6)
+        session.token = token
+        _sessions[token] = session
+    return session
+
+
+def get_session(token: str):
+    """Return the live session for token (refreshing its TTL), or None."""
+    now = time.time()
+    with _lock:
+        session = _sessions.get(token)
+        if session is None:
+            return None
+        if now - session.touched_at > QUIZ_SESSION_TTL:
+            del _sessions[token]
+            return None
+        session.touched_at = now
+        _sessions.move_to_end(token)
+    return session
+
+
+def advance(session: QuizSession, idx: int):
+    session.cursor = max(session.cursor, idx)
+
+
+def _evict(now: float):
+    # Caller holds _lock
+    while _sessions:
+        token, oldest = next(iter(_sessions.items()))
+        if len(_sessions) < QUIZ_SESSION_MAX and now - oldest.touched_at <= QUIZ_SESSION_TTL:
+            break
+        del _sessions[token]
+
+
+def clear():
+    with _lock:
+        _sessions.clear()
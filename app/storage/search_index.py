@@ -0,0 +1,314 @@
+"""
+In-memory full-text index over module questions and SQL challenges.
+
+Each module's questions and the challenge set form one partition. Before
+every search the partitions' store version tokens are compared with the ones
+indexed, and only changed partitions are re-indexed, so admin edits and
+ingests show up on the next query without a full rebuild.
+
+Scoring is BM25 over weighted field term frequencies. The last query term
+also matches as a prefix, which gives as-you-type results.
+
+Results are paged with opaque cursors that encode the sort key of the last
+item served, so a page boundary doesn't move when earlier items change.
+Indexed items only carry what a result card shows; answers, schemas and
+expected rows are fetched from the stores when an item is expanded.
+"""
+
+import base64
+import json
+import math
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from app.storage.question_store import load_questions, list_question_modules, questions_version
+from app.storage.challenge_store import load_all_challenges, challenges_version
+from app.timing import timed
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+
+QUESTION_FIELDS = {'prompt': 2.0, 'section_title': 1.5, 'answer': 1.0}
+CHALLENGE_FIELDS = {'title': 2.0, 'prompt': 2.0, 'concepts': 1.5, 'scenario': 1.0, 'answer': 1.0}
+FACETS = ('category', 'question_type', 'source')
+
+CHALLENGES_PARTITION = '~challenges'  # sorts after every module id
+
+_TOKEN_RE = re.compile(r'[a-z0-9_]+')
+
+_lock = threading.Lock()
+_partitions = {}  # partition -> (version, [doc keys])
+_docs = {}  # doc key -> browse item dict
+_order = {}  # doc key -> (partition, position) for the unranked listing
+_doc_len = {}  # doc key -> weighted length
+_doc_terms = {}  # doc key -> terms it was posted under, for removal
+_postings = {}  # term -> {doc key: weighted term frequency}
+_total_len = 0.0
+_terms = []  # sorted vocabulary for prefix lookups
+_terms_dirty = False
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class SearchPage:
+    items: list  # browse item dicts for this page
+    facets: dict  # facet field -> Counter over all query matches
+    total: int  # matches across every page
+    next_cursor: str = None  # None on the last page
+
+
+@timed('search')
+def search(query: str = '', category: str = '', q_type: str = '', source: str = '',
+           cursor: str = None, limit: int = None) -> SearchPage:
+    """Return one page of practice browser results.
+
+    Items come best match first, or in module order for an empty query.
+    Facets count the query matches with every filter applied except that
+    facet's own. Raises ValueError for a malformed cursor.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    filters = {'category': category, 'question_type': q_type, 'source': source}
+    with _lock:
+        _sync()
+        scores = _score(query)
+        keys = scores.keys() if scores is not None else _docs.keys()
+
+        facets = {name: Counter() for name in FACETS}
+        items = []
+        for key in keys:
+            doc = _docs[key]
+            failed = [name for name in FACETS if filters[name] and doc[name] != filters[name]]
+            if not failed:
+                items.append(key)
+            if len(failed) <= 1:
+                for name in FACETS:
+                    if not failed or failed == [name]:
+                        facets[name][doc[name]] += 1
+
+        if scores is not None:
+            sort_keys = {k: (-scores[k],) + _order[k] for k in items}
+        else:
+            sort_keys = {k: _order[k] for k in items}
+        items.sort(key=sort_keys.__getitem__)
+
+        start = 0
+        if after is not None:
+            try:
+                start = bisect_right([sort_keys[k] for k in items], after)
+            except TypeError:
+                raise ValueError(f'Invalid cursor: {cursor!r}')
+        end = len(items) if limit is None else start + limit
+        page = items[start:end]
+        next_cursor = _encode_cursor(sort_keys[page[-1]]) if page and end < len(items) else None
+        return SearchPage([_docs[k] for k in page], facets, len(items), next_cursor)
+
+
+def _encode_cursor(sort_key: tuple) -> str:
+    raw = json.dumps(sort_key, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    if not isinstance(key, list) or not key:
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return tuple(key)
+
+
+def facet_values(name: str) -> list:
+    """Every value a facet takes across the whole index, sorted."""
+    with _lock:
+        _sync()
+        return sorted({doc[name] for doc in _docs.values() if doc[name]})
+
+
+def _score(query: str):
+    """BM25 scores of documents matching every query term, or None for no query."""
+    terms = tokenize(query)
+    if not terms:
+        return None
+    prefix_last = not query[-1:].isspace()
+
+    n_docs = len(_docs)
+    avg_len = (_total_len / n_docs) if n_docs else 0.0
+    scores = None
+    for i, term in enumerate(terms):
+        if prefix_last and i == len(terms) - 1:
+            expansions = _expand_prefix(term)
+        else:
+            expansions = [term] if term in _postings else []
+
+        term_scores = {}
+        for t in expansions:
+            postings = _postings[t]
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * _doc_len[key] / avg_len)
+                s = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                if s > term_scores.get(key, 0.0):
+                    term_scores[key] = s
+
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {k: v + term_scores[k] for k, v in scores.items() if k in term_scores}
+        if not scores:
+            return {}
+    return scores
+
+
+def _sort_terms():
+    global _terms, _terms_dirty
+    if _terms_dirty:
+        _terms = sorted(_postings)
+        _terms_dirty = False
+
+
+def _expand_prefix(prefix: str) -> list:
+    _sort_terms()
+    expansions = []
+    i = bisect_left(_terms, prefix)
+    while i < len(_terms) and _terms[i].startswith(prefix) and len(expansions) < MAX_PREFIX_EXPANSIONS:
+        expansions.append(_terms[i])
+        i += 1
+    return expansions
+
+
+def build() -> int:
+    """Index everything now rather than on the first search; returns the
+    number of indexed items."""
+    with _lock:
+        _sync()
+        _sort_terms()
+        return len(_docs)
+
+
+def _sync():
+    """Re-index partitions whose store version changed since last indexed."""
+    current = {mid: questions_version(mid) for mid in list_question_modules()}
+    current[CHALLENGES_PARTITION] = challenges_version()
+
+    for partition in list(_partitions):
+        if partition not in current:
+            _drop_partition(partition)
+    for partition, version in current.items():
+        indexed = _partitions.get(partition)
+        if indexed is not None and indexed[0] == version:
+            continue
+        if indexed is not None:
+            _drop_partition(partition)
+        _index_partition(partition, version)
+
+
+def _index_partition(partition: str, version: str):
+    if partition == CHALLENGES_PARTITION:
+        entries = [(_challenge_item(c), _challenge_fields(c)) for c in load_all_challenges()]
+    else:
+        entries = [(_question_item(q), _question_fields(q)) for q in load_questions(partition)]
+
+    keys = []
+    for pos, (item, fields) in enumerate(entries):
+        key = (item['source'], item['id'])
+        keys.append(key)
+        _add_doc(key, item, fields)
+        _order[key] = (partition, pos)
+    _partitions[partition] = (version, keys)
+
+
+def _add_doc(key, item: dict, fields: list):
+    global _total_len, _terms_dirty
+    tf = Counter()
+    for text, weight in fields:
+        for term in tokenize(text):
+            tf[term] += weight
+    _docs[key] = item
+    _doc_terms[key] = tuple(tf)
+    _doc_len[key] = sum(tf.values())
+    _total_len += _doc_len[key]
+    for term, freq in tf.items():
+        if term not in _postings:
+            _postings[term] = {}
+            _terms_dirty = True
+        _postings[term][key] = freq
+
+
+def _drop_partition(partition: str):
+    global _total_len, _terms_dirty
+    _, keys = _partitions.pop(partition)
+    for key in keys:
+        _total_len -= _doc_len.pop(key, 0.0)
+        _docs.pop(key, None)
+        _order.pop(key, None)
+        for term in _doc_terms.pop(key, ()):
+            postings = _postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del _postings[term]
+                _terms_dirty = True
+
+
+def _question_fields(q) -> list:
+    return [(getattr(q, name), weight) for name, weight in QUESTION_FIELDS.items()]
+
+
+def _challenge_fields(c: dict) -> list:
+    fields = []
+    for name, weight in CHALLENGE_FIELDS.items():
+        value = c.get(name, '')
+        fields.append((' '.join(value) if isinstance(value, list) else value, weight))
+    return fields
+
+
+def _question_item(q) -> dict:
+    return {
+        'id': q.id,
+        'title': q.prompt[:120],
+        'prompt': q.prompt,
+        'category': q.category,
+        'question_type': q.question_type,
+        'source': 'module',
+        'module_id': q.module_id,
+        'section_title': q.section_title,
+        'code_language': q.code_language,
+        'is_challenge': False,
+    }
+
+
+def _challenge_item(c: dict) -> dict:
+    return {
+        'id': c['id'],
+        'title': c['title'],
+        'prompt': c['prompt'],
+        'category': c.get('category', ''),
+        'question_type': 'sql_challenge',
+        'source': 'challenge',
+        'difficulty': c.get('difficulty', ''),
+        'scenario': c.get('scenario', ''),
+        'concepts': c.get('concepts', []),
+        'has_sql': bool(c.get('sql_setup')),
+        'is_challenge': True,
+    }
+
+
+def clear():
+    global _total_len, _terms, _terms_dirty
+    with _lock:
+        _partitions.clear()
+        _docs.clear()
+        _order.clear()
+        _doc_len.clear()
+        _doc_terms.clear()
+        _postings.clear()
+        _total_len = 0.0
+        _terms = []
+        _terms_dirty = False
@@ -0,0 +1,102 @@
+"""
+Challenge table data stored as CSV or JSON-lines files.
+
+A challenge can list its tables under "sql_data" instead of writing their
+rows as INSERT statements in sql_setup:
+
+    "sql_data": [
+      {"table": "page_views", "file": "ecommerce-funnel/page_views.csv",
+       "columns": {"view_id": "INTEGER", "user_id": "INTEGER", "page_type": "TEXT"}}
+    ]
+
+file is relative to data/challenges/ and its extension picks the format.
+columns gives every column in file order with its declared SQL type, which
+decides how values are converted (by SQLite's affinity rules: INT ->
+int, REAL/FLOA/DOUB -> float, CHAR/CLOB/TEXT -> str, anything else as
+read). CSV files start with a header row naming the columns; an empty field
+is NULL, so tables with empty strings should use JSON lines, which hold one
+JSON array of values per row.
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass
+
+FORMATS = ('.csv', '.jsonl')
+
+
+@dataclass(slots=True)
+class TableData:
+    table: str
+    columns: dict  # column name -> declared type, in file order
+    rows: list  # tuples, values already converted
+
+
+def _converter(declared: str):
+    t = (declared or '').upper()
+    if 'INT' in t:
+        return int
+    if 'CHAR' in t or 'CLOB' in t or 'TEXT' in t:
+        return str
+    if 'REAL' in t or 'FLOA' in t or 'DOUB' in t:
+        return float
+    return None
+
+
+def _numeric(value: str):
+    """NUMERIC affinity: int or float if the text is one, else the text."""
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_table(path: str, table: str, columns: dict) -> TableData:
+    ext = os.path.splitext(path)[1]
+    if ext not in FORMATS:
+        raise ValueError(f'{path}: table files must be one of {", ".join(FORMATS)}')
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if ext == '.csv':
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if header != list(columns):
+                raise ValueError(f'{path}: header {header} does not match columns {list(columns)}')
+            converters = [_converter(t) for t in columns.values()]
+            rows = [tuple(None if v == '' else convert(v) if convert else _numeric(v)
+                          for v, convert in zip(row, converters))
+                    for row in reader]
+        else:
+            names = list(columns)
+            rows = []
+            for line in f:
+                if not line.strip():
+                    continue
+                values = json.loads(line)
+                if isinstance(values, dict):
+                    values = [values.get(name) for name in names]
+                rows.append(tuple(values))
+    return TableData(table, dict(columns), rows)
+
+
+def write_table(path: str, data: TableData):
+    """Write data in the format path's extension names (replacing path)."""
+    ext = os.path.splitext(path)[1]
+    if ext not in FORMATS:
+        raise ValueError(f'{path}: table files must be one of {", ".join(FORMATS)}')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        if ext == '.csv':
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(list(data.columns))
+            writer.writerows(['' if v is None else v for v in row] for row in data.rows)
+        else:
+            for row in data.rows:
+                f.write(json.dumps(list(row), ensure_ascii=False) + '\n')
+    os.replace(path + '.tmp', path)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,11 @@
+import os
+
+
+def file_version(path: str) -> str:
+    """Cheap version token for a data file: mtime + size, hex-encoded.
+
+    Tokens only change when the file is rewritten, so every worker that has
+    loaded the same file agrees on its version.
+    """
+    st = os.stat(path)
+    return f'{st.st_mtime_ns:x}-{st.st_size:x}'
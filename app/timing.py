@@ -0,0 +1,153 @@
+"""
+Per-request timing of the app's hot paths.
+
+- span(name) / @timed(name): add the wall time spent in a phase (storage,
+  search, markdown, template, flush, sql) to the current request's totals.
+  A span nested inside one of the same name counts once, so
+  load_all_questions calling load_questions isn't double-counted. Spans of
+  different names overlap: template includes the md filters it calls.
+  Outside a request (scripts, background threads) a span costs one
+  ContextVar lookup.
+- init_timing(app): report each request's totals in a Server-Timing header
+  (SERVER_TIMING) and/or as one JSON line on the 'app.requests' logger
+  (REQUEST_LOG). With both off no hooks are installed.
+"""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import before_render_template, template_rendered, request
+from app.config import SERVER_TIMING, REQUEST_LOG
+
+request_log = logging.getLogger('app.requests')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('start', 'seconds', 'calls', 'open')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.seconds = {}  # span name -> total seconds, in first-seen order
+        self.calls = {}
+        self.open = {}  # span name -> perf_counter() at entry
+
+    def begin(self, name: str) -> bool:
+        """Open a span; False if one of that name is already open."""
+        if name in self.open:
+            return False
+        self.open[name] = time.perf_counter()
+        return True
+
+    def end(self, name: str):
+        start = self.open.pop(name, None)
+        if start is None:
+            return
+        self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+
+def current():
+    """The running request's RequestTimings, or None."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    timings = _current.get()
+    if timings is None or not timings.begin(name):
+        yield
+        return
+    try:
+        yield
+    finally:
+        timings.end(name)
+
+
+def timed(name: str):
+    """Decorator form of span(name)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None or not timings.begin(name):
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.end(name)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings: RequestTimings) -> str:
+    parts = [f'{name};dur={secs * 1000:.2f}' for name, secs in timings.seconds.items()]
+    parts.append(f'total;dur={timings.total() * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def request_record(timings: RequestTimings, response) -> dict:
+    return {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'bytes': response.content_length,
+        'ms': round(timings.total() * 1000, 2),
+        'spans': {name: {'ms': round(secs * 1000, 2), 'calls': timings.calls[name]}
+                  for name, secs in timings.seconds.items()},
+    }
+
+
+def init_timing(app):
+    """Register before compression so the totals include it."""
+    if not (SERVER_TIMING or REQUEST_LOG):
+        return
+
+    if REQUEST_LOG and not request_log.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        request_log.addHandler(handler)
+        request_log.setLevel(logging.INFO)
+        request_log.propagate = False
+
+    @app.before_request
+    def start_timing():
+        _current.set(RequestTimings())
+
+    @app.after_request
+    def report_timing(response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        if SERVER_TIMING:
+            response.headers['Server-Timing'] = server_timing_header(timings)
+        if REQUEST_LOG:
+            request_log.info(json.dumps(request_record(timings, response)))
+        return response
+
+    @app.teardown_request
+    def stop_timing(exc):
+        _current.set(None)
+
+    def template_started(sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None:
+            timings.begin('template')
+
+    def template_finished(sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None:
+            timings.end('template')
+
+    # Strong refs: these closures would otherwise be collected on return
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
@@ -0,0 +1,94 @@
+"""
+Boot-time cache warm-up and the /ready endpoint.
+
+With WARM_CACHES on, create_app loads every module, question list and
+challenge, builds the question lookup indexes and the search index, and
+compiles every template before the app serves anything. Then gc.freeze()
+moves all of it out of the collector's reach: under `gunicorn --preload`
+the master does this once and forked workers share those pages
+copy-on-write, and since collections never touch frozen objects, workers
+don't copy the pages just to scan them.
+
+Progress is not warmed: it changes with every grade, and a worker forked
+later (e.g. after a crash) must not start from the master's stale copy.
+For the same reason, each worker checks the warmed caches against the data
+files on its first request and reloads anything changed since boot.
+
+GET /ready answers 200 once warm-up has finished (or if it is off) and 503
+if it failed, with what was loaded and how long it took.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from flask import jsonify
+from app.config import WARM_CACHES
+from app.storage import challenge_store, module_store, question_store, search_index
+from app.watcher import refresh_caches
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state = {'ready': not WARM_CACHES, 'warmed': None, 'error': ''}
+_warmed_pid = None  # process that ran warm_caches; workers forked from it refresh
+
+
+def warm_caches(app=None) -> dict:
+    """Fill the store caches and indexes (and compile app's templates);
+    returns counts and the seconds taken."""
+    start = time.perf_counter()
+    warmed = {
+        'modules': len(module_store.list_modules()),
+        'questions': question_store.build_indexes(),
+        'challenges': len(challenge_store.load_all_challenges()),
+        'search_items': search_index.build(),
+    }
+    if app is not None:
+        templates = app.jinja_env.list_templates(extensions=['html'])
+        for name in templates:
+            app.jinja_env.get_template(name)
+        warmed['templates'] = len(templates)
+    warmed['seconds'] = round(time.perf_counter() - start, 3)
+    return warmed
+
+
+def init_warmup(app):
+    app.add_url_rule('/ready', 'ready', ready)
+    if not WARM_CACHES:
+        return
+
+    global _warmed_pid
+    try:
+        _state['warmed'] = warm_caches(app)
+        _state['ready'] = True
+        log.info('Warmed caches: %s', _state['warmed'])
+    except Exception as e:
+        # Serve anyway, filling caches lazily; /ready reports the failure
+        log.exception('Cache warm-up failed')
+        _state['error'] = str(e) or e.__class__.__name__
+        return
+    _warmed_pid = os.getpid()
+    gc.collect()
+    gc.freeze()
+
+    @app.before_request
+    def refresh_after_fork():
+        global _warmed_pid
+        if _warmed_pid == os.getpid():
+            return
+        with _lock:
+            if _warmed_pid == os.getpid():
+                return
+            reloaded = refresh_caches()
+            if reloaded:
+                log.info('Reloaded data changed since warm-up: %s', ', '.join(reloaded))
+            _warmed_pid = os.getpid()
+
+
+def ready():
+    body = {'ready': _state['ready'], 'pid': os.getpid(), 'warmed': _state['warmed']}
+    if _state['error']:
+        body['error'] = _state['error']
+    return jsonify(body), 200 if _state['ready'] else 503
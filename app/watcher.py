@@ -0,0 +1,125 @@
+"""
+Watch mode: pick up edits to modules/ without re-running ingest by hand or
+restarting the app.
+
+With WATCH_MODULES set, each app worker process runs one background thread
+that, every WATCH_INTERVAL seconds (or as soon as inotify reports a change,
+when the optional inotify_simple package is installed):
+
+1. runs an incremental ingest if a file in modules/ was added, changed or
+   removed; only those files are re-parsed, and the manifest lock keeps
+   workers from doing the same work twice;
+2. reloads every cached module and question list whose data file changed,
+   whichever process rewrote it, swapping each cache entry in one step.
+
+The thread starts with a worker's first request rather than in create_app,
+so it is never inherited across a fork.
+"""
+
+import logging
+import os
+import threading
+import time
+from app.config import MODULES_DIR, WATCH_MODULES, WATCH_INTERVAL
+from app.storage import challenge_store, module_store, question_store
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_started_pid = None
+
+
+class SourceWatcher:
+    """Detects added, changed and removed markdown files in a directory."""
+
+    def __init__(self, directory: str = MODULES_DIR):
+        self.directory = directory
+        self._snapshot = self._scan()
+        self._inotify = None
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                self._inotify.add_watch(directory, flags.CLOSE_WRITE | flags.CREATE | flags.DELETE
+                                        | flags.MOVED_FROM | flags.MOVED_TO)
+            except OSError:
+                self._inotify = None
+        self.method = 'inotify' if self._inotify is not None else 'polling'
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.md'):
+                st = entry.stat()
+                snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds; True if the sources changed since the
+        last call."""
+        if self._inotify is not None:
+            # read_delay lets an editor's write-rename-chmod burst arrive as one
+            self._inotify.read(timeout=int(timeout * 1000), read_delay=100)
+        else:
+            time.sleep(timeout)
+        return self.changed()
+
+    def changed(self) -> bool:
+        snapshot = self._scan()
+        if snapshot == self._snapshot:
+            return False
+        self._snapshot = snapshot
+        return True
+
+
+def refresh_caches() -> list:
+    """Reload cached data whose files changed on disk; returns the module
+    and challenge ids."""
+    return sorted(set(module_store.refresh_cache()) | set(question_store.refresh_cache())
+                  | set(challenge_store.refresh_cache()))
+
+
+def init_watcher(app):
+    if not WATCH_MODULES:
+        return
+
+    @app.before_request
+    def ensure_watcher():
+        start_watcher()
+
+
+def start_watcher(interval: float = WATCH_INTERVAL):
+    """Start this process's watch thread unless it is already running."""
+    global _started_pid
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    threading.Thread(target=_watch, args=(interval,), name='module-watcher', daemon=True).start()
+
+
+def _watch(interval: float):
+    from app.ingest import run_ingest  # pulls in the parsers; only watch mode needs them
+    sources = SourceWatcher()
+    log.info('Watching %s (%s)', sources.directory, sources.method)
+    changed = True  # catch up with edits made while the app was down
+    while True:
+        try:
+            if changed:
+                changes = run_ingest(log=log.debug)
+                touched = {k: v for k, v in changes.items() if v and k != 'unchanged'}
+                if touched:
+                    log.info('Re-ingested modules: %s', touched)
+            reloaded = refresh_caches()
+            if reloaded:
+                log.info('Reloaded cached data for %s', ', '.join(reloaded))
+            changed = sources.wait(interval)
+        except Exception:
+            # Retried on the next edit rather than every interval
+            log.exception('Watch pass failed')
+            time.sleep(interval)
+            changed = False
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark keyword classification on large imported documents.
+
+Compares the shared KeywordClassifier (one trie-factored regex scan) with
+the previous approach of one substring search per keyword over upper- and
+lowercased copies of the text, on the module corpus repeated to the given
+size, classified whole and section by section. --extra-keywords pads every
+category with made-up keywords to show how each approach scales.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import MODULES_DIR
+from app.parser.keywords import CATEGORY_KEYWORDS
+from app.parser.classifier import KeywordClassifier
+from app.parser.master_doc_parser import parse_master_doc
+
+import argparse
+import glob
+import random
+import string
+import time
+
+
+def substring_scores(text, keywords):
+    """The pre-classifier auto_tag scoring, kept here as the baseline."""
+    text_upper = text.upper()
+    text_lower = text.lower()
+    scores = {}
+    for category, words in keywords.items():
+        if category == 'sql':
+            scores[category] = sum(1 for kw in words if kw.upper() in text_upper)
+        else:
+            scores[category] = sum(1 for kw in words if kw.lower() in text_lower)
+    return scores
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=2.0, help='document size (default: 2)')
+    parser.add_argument('--extra-keywords', type=int, default=0, metavar='N',
+                        help='add N random keywords per category')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, best kept')
+    args = parser.parse_args(argv)
+
+    corpus = '\n\n'.join(open(f, encoding='utf-8').read()
+                         for f in sorted(glob.glob(os.path.join(MODULES_DIR, '*.md'))))
+    doc = corpus * max(1, int(args.size_mb * 1024 * 1024 / len(corpus)))
+
+    keywords = {cat: dict(words) for cat, words in CATEGORY_KEYWORDS.items()}
+    rng = random.Random(0)
+    for words in keywords.values():
+        for _ in range(args.extra_keywords):
+            words[''.join(rng.choices(string.ascii_lowercase, k=8))] = 1.0
+    classifier = KeywordClassifier(keywords.items())
+
+    sections = parse_master_doc(doc).sections
+    texts = [s.title + ' ' + ' '.join(b.content for b in s.blocks) for s in sections]
+    n_keywords = sum(len(words) for words in keywords.values())
+    print(f'{len(doc) / 1024 / 1024:.1f} MB, {len(texts)} sections, {n_keywords} keywords')
+
+    rows = [
+        ('whole doc', lambda: substring_scores(doc, keywords), lambda: classifier.scores(doc)),
+        ('per section', lambda: [substring_scores(t, keywords) for t in texts],
+         lambda: [classifier.scores(t) for t in texts]),
+    ]
+    print(f'{"":<12} {"substring":>12} {"classifier":>12}')
+    for label, old, new in rows:
+        old_secs = timed(old, args.repeat)
+        new_secs = timed(new, args.repeat)
+        print(f'{label:<12} {old_secs * 1000:>10.1f}ms {new_secs * 1000:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
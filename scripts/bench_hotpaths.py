@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the app's hot paths.
+
+Each benchmark prepares its inputs once (seeded, so every run measures the
+same work), then is timed with timeit: the loop count is calibrated to take
+at least --min-time seconds and the best and median of --repeat runs are
+reported per call.
+
+  sql_small / sql_large     execute_and_compare on a bundled challenge, and on
+                            the same schema with --sql-rows generated rows
+  sql_large_tables          sql_large with the rows bulk-loaded from TableData
+                            (as from sql_data files) instead of INSERT text
+  sql_large_cases           sql_large_tables plus three hidden test cases of the
+                            same size (four datasets, checked in parallel)
+  sql_cached                sql_small answered from the result cache, as for a
+                            resubmitted query
+  questions_cold / _warm    load_all_questions from disk / from the cache
+  select_questions          quiz question selection plus resolving the ids
+                            (the former _resolve_question_ids step)
+  due_for_review_1k ...     UserProgress.due_for_review at 1k/10k/100k entries
+  flush_1k / flush_10k      progress_store.flush
+  parse_modules / extract   parse_module_file / extract_questions, all modules
+  md_filter                 the md template filter over one module's answers
+  render_*                  full GETs of the dashboard, a section, /practice/
+
+Progress is written to a temporary directory, never to data/. Use --json to
+save results and --compare to diff against a saved run.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import MODULES_DIR
+from app.models.challenge import ChallengeCase
+from app.models.progress import UserProgress, QuestionProgress
+from app.parser.module_parser import parse_module_file
+from app.parser.question_extractor import extract_questions
+from app.sql_runner import execute_and_compare
+from app.storage import progress_store, question_store
+from app.storage.challenge_store import load_challenge, load_challenge_tables, content_hash
+from app.storage.table_files import TableData
+from bench_ingest import git_revision
+
+import argparse
+import glob
+import json
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+BENCHMARKS = []  # (name, setup); setup(ctx) returns the function to time
+SMALL_CHALLENGE = 'ecommerce-funnel'
+PAGE_TYPES = ['home', 'product', 'cart']
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+LARGE_FUNNEL_DDL = ('CREATE TABLE page_views (view_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                    'page_type TEXT NOT NULL, view_timestamp TEXT NOT NULL);\n'
+                    'CREATE TABLE purchases (purchase_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                    'amount REAL NOT NULL, purchase_timestamp TEXT NOT NULL);')
+
+
+def large_funnel_tables(rows, rng):
+    """TableData for the funnel challenge's tables with rows page views."""
+    users = max(1, rows // 5)
+    views = [(i, rng.randrange(users), rng.choice(PAGE_TYPES), f'2024-01-{rng.randint(1, 31):02d} 10:00:00')
+             for i in range(1, rows + 1)]
+    purchases = [(i, rng.randrange(users), round(rng.uniform(5, 200), 2),
+                  f'2024-01-{rng.randint(1, 31):02d} 11:00:00')
+                 for i in range(1, rows // 10 + 1)]
+    return [
+        TableData('page_views', {'view_id': 'INTEGER', 'user_id': 'INTEGER', 'page_type': 'TEXT',
+                                 'view_timestamp': 'TEXT'}, views),
+        TableData('purchases', {'purchase_id': 'INTEGER', 'user_id': 'INTEGER', 'amount': 'REAL',
+                                'purchase_timestamp': 'TEXT'}, purchases),
+    ]
+
+
+def large_funnel_setup(tables):
+    """The same tables as one INSERT statement per row."""
+    lines = [LARGE_FUNNEL_DDL]
+    for t in tables:
+        for row in t.rows:
+            values = ', '.join(f"'{v}'" if isinstance(v, str) else repr(v) for v in row)
+            lines.append(f'INSERT INTO {t.table} VALUES ({values});')
+    return '\n'.join(lines)
+
+
+@benchmark('sql_small')
+def sql_small(ctx):
+    c = load_challenge(SMALL_CHALLENGE)
+    tables = load_challenge_tables(SMALL_CHALLENGE)
+    return lambda: execute_and_compare(c['sql_setup'], c['sql_answer'], c['sql_answer'], tables=tables)
+
+
+@benchmark('sql_large')
+def sql_large(ctx):
+    c = load_challenge(SMALL_CHALLENGE)
+    setup = large_funnel_setup(large_funnel_tables(ctx['sql_rows'], ctx['rng']))
+    return lambda: execute_and_compare(setup, c['sql_answer'], c['sql_answer'])
+
+
+@benchmark('sql_large_tables')
+def sql_large_tables(ctx):
+    c = load_challenge(SMALL_CHALLENGE)
+    tables = large_funnel_tables(ctx['sql_rows'], ctx['rng'])
+    return lambda: execute_and_compare(LARGE_FUNNEL_DDL, c['sql_answer'], c['sql_answer'], tables=tables)
+
+
+@benchmark('sql_large_cases')
+def sql_large_cases(ctx):
+    c = load_challenge(SMALL_CHALLENGE)
+    tables = large_funnel_tables(ctx['sql_rows'], ctx['rng'])
+    cases = [ChallengeCase(f'case {i + 1}', LARGE_FUNNEL_DDL, large_funnel_tables(ctx['sql_rows'], ctx['rng']))
+             for i in range(3)]
+    return lambda: execute_and_compare(LARGE_FUNNEL_DDL, c['sql_answer'], c['sql_answer'], tables=tables,
+                                       cases=cases)
+
+
+@benchmark('sql_cached')
+def sql_cached(ctx):
+    c = load_challenge(SMALL_CHALLENGE)
+    tables = load_challenge_tables(SMALL_CHALLENGE)
+    key = content_hash(SMALL_CHALLENGE)
+    return lambda: execute_and_compare(c['sql_setup'], c['sql_answer'], c['sql_answer'], tables=tables,
+                                       cache_key=key)
+
+
+@benchmark('questions_cold')
+def questions_cold(ctx):
+    def run():
+        question_store.clear_cache()
+        question_store.load_all_questions()
+    return run
+
+
+@benchmark('questions_warm')
+def questions_warm(ctx):
+    question_store.load_all_questions()
+    return question_store.load_all_questions
+
+
+@benchmark('select_questions')
+def select_questions(ctx):
+    rng = ctx['rng']
+    question_store.load_all_questions()
+
+    def run():
+        ids = question_store.select_questions(count=10, rng=rng)
+        return [question_store.get_question(qid) for qid in ids]
+    return run
+
+
+def make_progress(entries, rng, module_ids):
+    """UserProgress with entries graded questions, next reviews within +/-30 days."""
+    p = UserProgress()
+    today = date.today()
+    for i in range(entries):
+        p.questions[f'q{i}'] = QuestionProgress(
+            question_id=f'q{i}', module_id=rng.choice(module_ids), category='sql',
+            status=rng.choice(['correct', 'attempted', 'needs_review']), attempts=rng.randint(1, 5),
+            last_grade='correct', last_attempt=today.isoformat(),
+            next_review=(today + timedelta(days=rng.randint(-30, 30))).isoformat())
+    p.rebuild_stats()
+    return p
+
+
+for n, label in ((1000, '1k'), (10000, '10k'), (100000, '100k')):
+    @benchmark(f'due_for_review_{label}')
+    def due_for_review(ctx, n=n):
+        return make_progress(n, ctx['rng'], ctx['module_ids']).due_for_review
+
+
+for n, label in ((1000, '1k'), (10000, '10k')):
+    @benchmark(f'flush_{label}')
+    def flush(ctx, n=n):
+        progress_store._progress = make_progress(n, ctx['rng'], ctx['module_ids'])
+        return progress_store.flush
+
+
+@benchmark('parse_modules')
+def parse_modules(ctx):
+    paths = ctx['module_paths']
+    return lambda: [parse_module_file(p) for p in paths]
+
+
+@benchmark('extract_questions')
+def extract(ctx):
+    modules = [parse_module_file(p) for p in ctx['module_paths']]
+    return lambda: [extract_questions(m) for m in modules]
+
+
+@benchmark('md_filter')
+def md_filter(ctx):
+    md = ctx['app'].jinja_env.filters['md']
+    answers = [q.answer for q in question_store.load_questions(ctx['module_ids'][0])]
+    return lambda: [md(a) for a in answers]
+
+
+for name, path in (('render_dashboard', '/'), ('render_section', '/module/module-01/section/1'),
+                   ('render_browse', '/practice/')):
+    @benchmark(name)
+    def render(ctx, path=path):
+        client = ctx['app'].test_client()
+
+        def run():
+            r = client.get(path)
+            assert r.status_code == 200, (path, r.status_code)
+        return run
+
+
+def measure(func, min_time, repeat):
+    timer = timeit.Timer(func)
+    loops, secs = timer.autorange()
+    while secs < min_time:
+        loops *= 2
+        secs = timer.timeit(loops)
+    times = [secs / loops] + [t / loops for t in timer.repeat(repeat - 1, loops)]
+    return {'loops': loops, 'best_us': min(times) * 1e6, 'median_us': statistics.median(times) * 1e6}
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f'\nvs {baseline_path} (best per call; * beyond {threshold:.0%})')
+    for name, r in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f'{name:<22} {"new":>10}')
+            continue
+        ratio = r['best_us'] / old['best_us'] if old['best_us'] else float('inf')
+        flag = ' *' if abs(ratio - 1) > threshold else ''
+        print(f'{name:<22} {old["best_us"]:>12.1f} -> {r["best_us"]:>12.1f} us  {ratio:>6.2f}x{flag}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help='run only benchmarks whose name contains one of these')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per benchmark (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per run (default: 0.2)')
+    parser.add_argument('--sql-rows', type=int, default=20000, help='page views in sql_large (default: 20000)')
+    parser.add_argument('--json', metavar='PATH', help='also write results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare with a previous --json run')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative change flagged by --compare (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix='bench-hotpaths-')
+    progress_store.PROGRESS_FILE = os.path.join(work, 'progress.json')
+    from app import create_app
+    ctx = {
+        'app': create_app(),
+        'module_paths': sorted(glob.glob(os.path.join(MODULES_DIR, '*.md'))),
+        'module_ids': question_store.list_question_modules(),
+        'sql_rows': args.sql_rows,
+    }
+
+    results = {}
+    try:
+        print(f'{"benchmark":<22} {"loops":>7} {"best us":>12} {"median us":>12}')
+        for name, setup in BENCHMARKS:
+            if args.names and not any(n in name for n in args.names):
+                continue
+            # Each benchmark starts from empty progress
+            ctx['rng'] = random.Random(args.seed)
+            progress_store._progress = None
+            if os.path.exists(progress_store.PROGRESS_FILE):
+                os.remove(progress_store.PROGRESS_FILE)
+            r = results[name] = measure(setup(ctx), args.min_time, args.repeat)
+            print(f'{name:<22} {r["loops"]:>7} {r["best_us"]:>12.1f} {r["median_us"]:>12.1f}')
+    finally:
+        progress_store._progress = None
+        shutil.rmtree(work, ignore_errors=True)
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+    if args.json:
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'seed': args.seed,
+            'sql_rows': args.sql_rows,
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f'Wrote {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Benchmark ingest throughput and peak memory per stage.
+
+Generates a synthetic corpus (see generate_corpus.py) or uses --corpus,
+then times each stage over every module:
+
+  parse       module_parser.parse_module_file
+  extract     question_extractor.extract_questions
+  save        module_store.save_module + question_store.save_questions
+  load        cold module_store / question_store loads of what was saved
+  master_doc  streaming master_doc_parser + per-section extraction over the
+              whole corpus as one import, as /admin/ingest does it
+
+Stores write to a temporary directory, never to data/. Each stage is timed
+on its own, then run again under tracemalloc for its peak Python heap. Use
+--json to keep results for comparison across releases.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.parser.module_parser import parse_module_file
+from app.parser.question_extractor import extract_questions, extract_from_section
+from app.parser.master_doc_parser import iter_sections
+from app.storage import module_store, question_store
+from generate_corpus import generate_corpus
+
+import argparse
+import glob
+import io
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+
+def run_stages(paths, data_dir):
+    """Yield (stage, function) pairs; each function returns items processed."""
+    state = {}
+
+    def parse():
+        state['modules'] = [parse_module_file(p) for p in paths]
+        return sum(len(m.sections) for m in state['modules'])
+
+    def extract():
+        state['questions'] = [extract_questions(m) for m in state['modules']]
+        return sum(len(qs) for qs in state['questions'])
+
+    def save():
+        for module, questions in zip(state['modules'], state['questions']):
+            module_store.save_module(module)
+            question_store.save_questions(module.id, questions)
+        return len(state['modules'])
+
+    def load():
+        module_store.clear_cache()
+        question_store.clear_cache()
+        for module in state['modules']:
+            module_store.load_module(module.id)
+            question_store.load_questions(module.id)
+        return len(state['modules'])
+
+    def master_doc():
+        corpus = os.path.join(data_dir, 'corpus.md')
+        if not os.path.exists(corpus):
+            with open(corpus, 'w', encoding='utf-8') as out:
+                for p in paths:
+                    with open(p, encoding='utf-8') as f:
+                        out.write(f.read())
+        sections = 0
+        with open(corpus, 'rb') as raw:
+            for section in iter_sections(io.TextIOWrapper(raw, encoding='utf-8')):
+                extract_from_section('bench', section)
+                sections += 1
+        return sections
+
+    return [('parse', parse), ('extract', extract), ('save', save), ('load', load),
+            ('master_doc', master_doc)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sections', type=int, default=1000, help='synthetic sections (default: 1000)')
+    parser.add_argument('--per-module', type=int, default=25, help='sections per module (default: 25)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', metavar='DIR', help='benchmark Module-*.md files in DIR instead')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--json', metavar='PATH', help='also write results as JSON')
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix='bench-ingest-')
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(args.corpus, '*.md')))
+    else:
+        paths = generate_corpus(os.path.join(work, 'modules'), args.sections, args.per_module, args.seed)
+    corpus_bytes = sum(os.path.getsize(p) for p in paths)
+
+    # Keep the stores away from data/
+    module_store.DATA_MODULES_DIR = os.path.join(work, 'data', 'modules')
+    question_store.DATA_QUESTIONS_DIR = os.path.join(work, 'data', 'questions')
+
+    results = {}
+    try:
+        for stage, func in run_stages(paths, work):
+            start = time.perf_counter()
+            items = func()
+            results[stage] = {'seconds': time.perf_counter() - start, 'items': items}
+
+        if not args.no_memory:
+            for stage, func in run_stages(paths, work):
+                tracemalloc.start()
+                func()
+                results[stage]['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+    finally:
+        module_store.clear_cache()
+        question_store.clear_cache()
+        shutil.rmtree(work, ignore_errors=True)
+
+    n_sections = results['parse']['items']
+    print(f'{len(paths)} modules, {n_sections} sections, {corpus_bytes / 1024 / 1024:.1f} MB')
+    print(f'{"stage":<12} {"seconds":>9} {"items":>8} {"items/s":>10} {"MB/s":>8} {"peak MB":>9}')
+    for stage, r in results.items():
+        secs = r['seconds']
+        r['items_per_sec'] = r['items'] / secs if secs else 0.0
+        r['mb_per_sec'] = corpus_bytes / 1024 / 1024 / secs if secs else 0.0
+        peak = f'{r["peak_mb"]:>9.1f}' if 'peak_mb' in r else f'{"-":>9}'
+        print(f'{stage:<12} {secs:>9.3f} {r["items"]:>8} {r["items_per_sec"]:>10.0f} '
+              f'{r["mb_per_sec"]:>8.1f} {peak}')
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'max RSS {max_rss_mb:.0f} MB')
+
+    if args.json:
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'corpus': {'modules': len(paths), 'sections': n_sections, 'bytes': corpus_bytes,
+                       'seed': None if args.corpus else args.seed},
+            'stages': results,
+            'max_rss_mb': max_rss_mb,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f'Wrote {args.json}')
+
+
+if __name__ == '__main__':
+    main()
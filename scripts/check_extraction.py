@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Check that parsing modules/*.md reproduces the committed data files.
+
+data/modules and data/questions act as regression fixtures for the module
+parser and question extractor: run this after changing either, before
+re-ingesting. Prints the first difference per module and exits non-zero if
+any module's sections or questions changed.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import MODULES_DIR, DATA_MODULES_DIR, DATA_QUESTIONS_DIR
+from app.parser.module_parser import parse_module_file
+from app.parser.question_extractor import extract_questions
+
+import glob
+import json
+
+
+def first_difference(expected, actual, path=''):
+    """Path and values of the first place two JSON values differ, or None."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            diff = first_difference(expected.get(key), actual.get(key), f'{path}.{key}')
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diff = first_difference(e, a, f'{path}[{i}]')
+            if diff:
+                return diff
+        if len(expected) != len(actual):
+            return f'{path}: {len(expected)} items expected, got {len(actual)}'
+        return None
+    if expected != actual:
+        return f'{path}: expected {expected!r:.80}, got {actual!r:.80}'
+    return None
+
+
+def load_fixture(directory, module_id):
+    path = os.path.join(directory, f'{module_id}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    md_files = sorted(glob.glob(os.path.join(MODULES_DIR, '*.md')))
+    failures = 0
+    for filepath in md_files:
+        module = parse_module_file(filepath)
+        # Manually added questions aren't produced by the extractor
+        expected_questions = load_fixture(DATA_QUESTIONS_DIR, module.id)
+        if expected_questions is not None:
+            expected_questions = [q for q in expected_questions if q.get('source') != 'manual']
+        checks = [
+            ('module', load_fixture(DATA_MODULES_DIR, module.id), module.to_dict()),
+            ('questions', expected_questions, [q.to_dict() for q in extract_questions(module)]),
+        ]
+        for label, expected, actual in checks:
+            if expected is None:
+                print(f'{module.id} {label}: no fixture (run scripts/ingest_all.py)')
+                failures += 1
+                continue
+            diff = first_difference(expected, actual)
+            if diff:
+                print(f'{module.id} {label}{diff}')
+                failures += 1
+
+    print(f'{len(md_files)} modules checked, {failures} mismatches')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Move challenge rows out of sql_setup INSERT statements into data files.
+
+For each challenge (all of data/challenges/, or the ids given), every
+`INSERT INTO table [(columns)] VALUES ...` statement is removed from
+sql_setup and the table's rows are written to data/challenges/<id>/<table>.csv
+(or .jsonl), listed under "sql_data" with the column types declared by the
+table's CREATE TABLE. See app/storage/table_files.py for the format.
+
+The rows are read back out of SQLite after running the original script, so
+values come out exactly as the INSERTs produced them. The files are written
+to a temporary directory first and read back the way the app reads them;
+only if every table and the reference and alternate answers' output then
+match the original is the challenge changed. The same goes for the
+answers' output on each of the challenge's test_cases, since a case without
+its own sql_setup is built on the rows being moved. A challenge whose setup
+changes data any other way (UPDATE, INSERT ... SELECT, ...) is left alone.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import DATA_CHALLENGES_DIR
+from app.sql_runner import load_tables
+from app.storage.challenge_store import challenge_cases
+from app.storage.table_files import TableData, quote_identifier, read_table, write_table
+
+import argparse
+import json
+import re
+import shutil
+import sqlite3
+import tempfile
+
+INSERT_RE = re.compile(r'^INSERT\s+INTO\s+("(?:[^"]|"")+"|\w+)\s*(?:\([^)]*\)\s*)?VALUES\b', re.IGNORECASE)
+DML_RE = re.compile(r'^(INSERT|REPLACE|UPDATE|DELETE|UPSERT)\b', re.IGNORECASE)
+COMMENT_RE = re.compile(r'^(\s*(--[^\n]*\n?|/\*.*?\*/))*\s*', re.DOTALL)
+
+
+def split_statements(script: str) -> list:
+    """Statements of script with their original text (leading comments and
+    whitespace included); trailing text without a ';' is the last item."""
+    statements, start = [], 0
+    for i, ch in enumerate(script):
+        if ch == ';' and sqlite3.complete_statement(script[start:i + 1]):
+            statements.append(script[start:i + 1])
+            start = i + 1
+    if script[start:].strip():
+        statements.append(script[start:])
+    return statements
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1].replace('""', '"') if name.startswith('"') else name
+
+
+def dump_tables(conn, names) -> list:
+    tables = []
+    for name in names:
+        info = conn.execute(f'PRAGMA table_info({quote_identifier(name)})').fetchall()
+        columns = {row[1]: row[2] for row in info}
+        select = f'SELECT {", ".join(quote_identifier(c) for c in columns)} FROM {quote_identifier(name)}'
+        try:
+            rows = conn.execute(select + ' ORDER BY rowid').fetchall()
+        except sqlite3.OperationalError:  # WITHOUT ROWID
+            rows = conn.execute(select).fetchall()
+        tables.append(TableData(name, columns, rows))
+    return tables
+
+
+def _database(setup_sql, tables=()):
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(setup_sql)
+    if tables:
+        load_tables(conn, tables)
+    return conn
+
+
+def _query(conn, sql):
+    if not sql:
+        return None
+    try:
+        cursor = conn.execute(sql)
+        return [d[0] for d in cursor.description], cursor.fetchall()
+    except sqlite3.Error as e:
+        return f'error: {e}'
+
+
+def convert(challenge: dict, fmt: str):
+    """(new sql_setup, [(TableData, relative file)]) or raises ValueError."""
+    kept, targets = [], []
+    for statement in split_statements(challenge.get('sql_setup') or ''):
+        body = COMMENT_RE.sub('', statement, count=1)
+        match = INSERT_RE.match(body)
+        if match:
+            name = _unquote(match.group(1))
+            if name not in targets:
+                targets.append(name)
+        elif DML_RE.match(body):
+            raise ValueError(f'setup changes data with: {body.split(None, 2)[:2]}')
+        else:
+            kept.append(statement)
+    if not targets:
+        raise ValueError('no INSERT ... VALUES statements')
+
+    original = _database(challenge['sql_setup'])
+    tables = dump_tables(original, targets)
+    files = []
+    for t in tables:
+        if any(isinstance(v, bytes) for row in t.rows for v in row):
+            raise ValueError(f'{t.table} holds BLOBs, which data files cannot')
+        # An empty field reads back as NULL in CSV
+        has_empty = any(v == '' for row in t.rows for v in row)
+        ext = '.jsonl' if fmt == 'jsonl' or has_empty else '.csv'
+        filename = re.sub(r'[^\w.-]+', '_', t.table) + ext
+        files.append((t, f"{challenge['id']}/{filename}"))
+
+    setup = re.sub(r'\n{3,}', '\n\n', ''.join(kept)).strip() + '\n'
+    return setup, files
+
+
+def _case_datasets(challenge: dict, tables: list, data_dir: str) -> list:
+    """[[TableData]]: tables, then each test case's sql_data from data_dir."""
+    return [tables] + [[read_table(os.path.join(data_dir, spec['file']), spec['table'], spec['columns'])
+                        for spec in case.get('sql_data', [])]
+                       for case in challenge.get('test_cases', [])]
+
+
+def verify(challenge: dict, setup: str, tables: list, data_dir: str):
+    """Raise ValueError unless the converted challenge loads the same data
+    and its answers return the same rows, on its own data and every test case."""
+    original = _database(challenge['sql_setup'])
+    converted = _database(setup, tables)
+    names = [r[0] for r in original.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+    for before, after in zip(dump_tables(original, names), dump_tables(converted, names)):
+        if before != after:
+            raise ValueError(f'{before.table} differs after conversion')
+    queries = [('sql_answer', challenge.get('sql_answer'))]
+    queries += [(f'alternate answer {i + 1}', sql) for i, sql in enumerate(challenge.get('alternate_answers', []))]
+    for label, sql in queries:
+        if _query(original, sql) != _query(converted, sql):
+            raise ValueError(f'{label} returns different rows after conversion')
+
+    cases_before = challenge_cases(challenge, _case_datasets(challenge, [], data_dir))
+    cases_after = challenge_cases(dict(challenge, sql_setup=setup), _case_datasets(challenge, tables, data_dir))
+    for before, after in zip(cases_before, cases_after):
+        original, converted = _database(before.setup_sql, before.tables), _database(after.setup_sql, after.tables)
+        for label, sql in queries:
+            if _query(original, sql) != _query(converted, sql):
+                raise ValueError(f'{label} returns different rows on test case {before.name!r} after conversion')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('ids', nargs='*', help='challenge ids (default: every challenge)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv',
+                        help='data file format (default: csv; jsonl where a table has empty strings)')
+    parser.add_argument('--dir', default=DATA_CHALLENGES_DIR, help='challenges directory (default: data/challenges)')
+    parser.add_argument('--dry-run', action='store_true', help='report what would change, write nothing')
+    args = parser.parse_args(argv)
+
+    ids = args.ids or sorted(f[:-len('.json')] for f in os.listdir(args.dir) if f.endswith('.json'))
+    failed = 0
+    for challenge_id in ids:
+        path = os.path.join(args.dir, f'{challenge_id}.json')
+        with open(path, 'r', encoding='utf-8') as f:
+            challenge = json.load(f)
+        if challenge.get('sql_data'):
+            print(f'{challenge_id}: already uses data files')
+            continue
+        work = tempfile.mkdtemp(prefix='challenge-data-')
+        try:
+            try:
+                setup, files = convert(challenge, args.format)
+                for t, rel in files:
+                    write_table(os.path.join(work, rel), t)
+                verify(challenge, setup, [read_table(os.path.join(work, rel), t.table, t.columns)
+                                          for t, rel in files], args.dir)
+            except (ValueError, sqlite3.Error) as e:
+                print(f'{challenge_id}: skipped ({e})')
+                failed += bool(args.ids)
+                continue
+
+            for t, rel in files:
+                print(f'{challenge_id}: {t.table} {len(t.rows)} rows -> {rel}')
+            print(f'{challenge_id}: sql_setup {len(challenge["sql_setup"])} -> {len(setup)} chars')
+            if args.dry_run:
+                continue
+            for _, rel in files:
+                os.makedirs(os.path.dirname(os.path.join(args.dir, rel)), exist_ok=True)
+                shutil.move(os.path.join(work, rel), os.path.join(args.dir, rel))
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+        challenge['sql_setup'] = setup
+        challenge['sql_data'] = [{'table': t.table, 'file': rel, 'columns': t.columns} for t, rel in files]
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(challenge, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        os.replace(path + '.tmp', path)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
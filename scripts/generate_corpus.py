@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Generate a synthetic module corpus for ingest benchmarks.
+
+Writes Module-NN-Synthetic.md files in the same shape as modules/*.md:
+a title and topics line, emoji-prefixed H2 concept sections with prose,
+bullets, tables, code fences and Quick quiz/Answer pairs, then a
+behavioral section, Module 14 style rounds and a self-test. Output is
+deterministic for a given --seed.
+"""
+
+import argparse
+import os
+import random
+
+TOPICS = {
+    '🔷 SQL': ['window functions', 'self joins', 'CTEs', 'NULL handling', 'GROUP BY with HAVING',
+              'LAG and LEAD', 'running totals', 'deduplication', 'date truncation', 'anti joins'],
+    '🔶 Python': ['groupby and merge', 'transform vs apply', 'pivot tables', 'dict comprehensions',
+                 'generators', 'loc vs iloc', 'vectorization', 'missing values', 'string methods'],
+    '🟢 Stats': ['p-values', 'confidence intervals', 'power analysis', 'Bayes rule', 'the CLT',
+                'Poisson processes', 'type I and type II errors', 'variance reduction'],
+    '🟠 ML': ['regularization', 'cross-validation', 'precision and recall', 'gradient boosting',
+             'feature engineering', 'class imbalance', 'the bias-variance tradeoff', 'ROC curves'],
+    '🟣 Terminology': ['ETL vs ELT', 'OLTP vs OLAP', 'star schemas', 'data lakes', 'idempotency',
+                      'slowly changing dimensions', 'partitioning'],
+}
+
+WORDS = ('the query model metric sample table column user order revenue daily cohort '
+         'estimate result signal value rows index group average rate test effect data '
+         'pipeline feature prediction error distribution interval interview answer').split()
+
+SQL_SNIPPETS = [
+    'SELECT customer_id, SUM(amount) AS total\nFROM orders\nGROUP BY customer_id\nHAVING SUM(amount) > 100;',
+    'WITH ranked AS (\n  SELECT *, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY ts DESC) AS rn\n'
+    '  FROM events\n)\nSELECT * FROM ranked WHERE rn = 1;',
+    'SELECT a.id, b.id\nFROM employees a\nJOIN employees b ON a.manager_id = b.manager_id\nWHERE a.id < b.id;',
+    "SELECT DATE_TRUNC('month', created_at) AS month, COUNT(*)\nFROM signups\nGROUP BY 1\nORDER BY 1;",
+]
+
+PYTHON_SNIPPETS = [
+    "df['share'] = df['sales'] / df.groupby('region')['sales'].transform('sum')",
+    "merged = pd.merge(users, orders, on='user_id', how='left', indicator=True)\n"
+    "never = merged[merged['_merge'] == 'left_only']",
+    "counts = {}\nfor word in words:\n    counts[word] = counts.get(word, 0) + 1",
+    "df.loc[df['score'] > 0.5, 'label'] = 1\ndf = df.dropna(subset=['label'])",
+]
+
+ROUNDS = ['Speed Definitions (30 seconds each)', 'SQL (Write the Query)',
+          'Stats & Probability (Explain It)', 'ML (Explain the Tradeoff)',
+          'Python/Pandas (What\'s Wrong?)', 'Product Sense (Structure Your Answer)']
+
+BEHAVIORAL_PROMPTS = [
+    'Tell me about a time you disagreed with a stakeholder',
+    'Describe a project where the data was messier than expected',
+    'How do you prioritize when everything is urgent',
+    'Give me an example of a mistake you made and what you learned',
+]
+
+
+def sentence(rng, n=12):
+    words = rng.choices(WORDS, k=n)
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng, sentences=3):
+    return ' '.join(sentence(rng, rng.randint(8, 18)) for _ in range(sentences))
+
+
+def code_block(rng, lang):
+    snippets = SQL_SNIPPETS if lang == 'sql' else PYTHON_SNIPPETS
+    return f'```{lang}\n{rng.choice(snippets)}\n```'
+
+
+def concept_section(rng, prefix, topic):
+    lang = 'sql' if 'SQL' in prefix else 'python'
+    parts = [f'## {prefix}: {topic.capitalize()}', '', paragraph(rng), '']
+    if rng.random() < 0.6:
+        parts += [code_block(rng, lang), '']
+    if rng.random() < 0.5:
+        parts += [f'**{sentence(rng, 4)[:-1]}:**'] + [f'- {sentence(rng, 9)}' for _ in range(3)] + ['']
+    if rng.random() < 0.3:
+        parts += ['| Term | Meaning |', '|------|---------|']
+        parts += [f'| {rng.choice(WORDS)} | {sentence(rng, 6)} |' for _ in range(3)] + ['']
+    if rng.random() < 0.3:
+        parts += [f'### {sentence(rng, 3)[:-1]}', '', paragraph(rng, 2), '']
+    if rng.random() < 0.7:
+        parts += [f'**Quick quiz:** {sentence(rng, 14)[:-1]}?', '']
+        if 'SQL' in prefix or ('Python' in prefix and rng.random() < 0.5):
+            parts += ['**Answer:**', code_block(rng, lang), '']
+        else:
+            parts += [f'**Answer:** {paragraph(rng, 2)}', '']
+    parts += ['---', '']
+    return parts
+
+
+def behavioral_section(rng):
+    parts = ['## 🎯 Behavioral: STAR Practice', '', paragraph(rng, 2), '']
+    for i, prompt in enumerate(rng.sample(BEHAVIORAL_PROMPTS, 2), 1):
+        parts += [f'**{i}. "{prompt}"** (2 min)', '', paragraph(rng, 1), '']
+    parts += [f'**Homework:** {sentence(rng, 12)[:-1]} and time yourself.', '', '---', '']
+    return parts
+
+
+def round_section(rng, number):
+    name = ROUNDS[(number - 1) % len(ROUNDS)]
+    parts = [f'## Round {number}: {name}', '']
+    for i in range(1, rng.randint(4, 6)):
+        parts += [f'**{i}.** {sentence(rng, 10)[:-1]}?', '']
+        if 'SQL' in name:
+            parts += [code_block(rng, 'sql'), '']
+        elif 'Python' in name:
+            parts += [code_block(rng, 'python'), '']
+        else:
+            parts += [paragraph(rng, 1), '']
+    parts += ['---', '']
+    return parts
+
+
+def self_test_section(rng, number, n=6):
+    parts = [f'## Module {number:02d} Self-Test', '']
+    parts += [f'{i}. {sentence(rng, 10)[:-1]}?' for i in range(1, n + 1)]
+    parts += ['', '**Answers:**']
+    parts += [f'{i}. {paragraph(rng, 1)}' for i in range(1, n + 1)]
+    parts += ['']
+    return parts
+
+
+def generate_module(number: int, n_sections: int, rng) -> str:
+    """Markdown for one module with n_sections (at least 1) H2 sections."""
+    categories = list(TOPICS)
+    lines = [f'# Module {number:02d} — Synthetic {number}', '',
+             f'*Topics: {", ".join(rng.sample([t for ts in TOPICS.values() for t in ts], 4))}*', '', '---', '']
+    # Modules of 4+ sections end with behavioral, round and self-test sections
+    closing = 3 if n_sections >= 4 else 1
+    for i in range(n_sections - closing):
+        prefix = categories[(number + i) % len(categories)]
+        lines += concept_section(rng, prefix, rng.choice(TOPICS[prefix]))
+    if closing == 3:
+        lines += behavioral_section(rng)
+        lines += round_section(rng, number % len(ROUNDS) + 1)
+    lines += self_test_section(rng, number)
+    return '\n'.join(lines) + '\n'
+
+
+def generate_corpus(out_dir: str, sections: int = 1000, per_module: int = 25, seed: int = 0) -> list:
+    """Write the corpus; returns the file paths in module order."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    number = 0
+    while sections > 0:
+        number += 1
+        n = min(per_module, sections)
+        path = os.path.join(out_dir, f'Module-{number:02d}-Synthetic.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_module(number, n, rng))
+        paths.append(path)
+        sections -= n
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir', help='directory to write Module-*.md files to')
+    parser.add_argument('--sections', type=int, default=1000, help='total H2 sections (default: 1000)')
+    parser.add_argument('--per-module', type=int, default=25, help='sections per module (default: 25)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = generate_corpus(args.out_dir, args.sections, args.per_module, args.seed)
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f'Wrote {len(paths)} modules, {args.sections} sections, {size / 1024 / 1024:.1f} MB to {args.out_dir}')
+
+
+if __name__ == '__main__':
+    main()
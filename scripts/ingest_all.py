@@ -1,60 +1,62 @@
 #!/usr/bin/env python3
-"""Parse all markdown modules into JSON data files."""
+"""Parse all markdown modules into JSON data files.
 
-import sys
-import os
+Each source file is hashed and compared with data/ingest-manifest.json;
+unchanged files are skipped unless the parser itself changed or --force is
+given. The manifest records every file's hash and what this run changed.
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+With --jobs N the remaining files are parsed and extracted in a pool of N
+processes; results are gathered in file order and written from this process.
 
-from app.config import MODULES_DIR
-from app.parser.module_parser import parse_module_file
-from app.parser.question_extractor import extract_questions
-from app.storage.module_store import save_module
-from app.storage.question_store import save_questions
+With --watch it keeps running after the first pass and re-ingests whenever
+a file in modules/ is added, changed or removed. App workers started with
+WATCH_MODULES=1 pick the new data up without a restart.
+"""
 
-import glob
+import sys
+import os
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def main():
-    md_files = sorted(glob.glob(os.path.join(MODULES_DIR, '*.md')))
-    if not md_files:
-        print(f'No markdown files found in {MODULES_DIR}')
+from app.config import WATCH_INTERVAL
+from app.ingest import run_ingest
+from app.watcher import SourceWatcher
+
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true',
+                        help='re-parse every file even if its hash is unchanged')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='parse files in N worker processes (default: 1)')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and re-ingest modules/ when it changes')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, metavar='SECONDS',
+                        help=f'how often --watch polls for changes (default: {WATCH_INTERVAL})')
+    args = parser.parse_args(argv)
+
+    try:
+        run_ingest(force=args.force, jobs=args.jobs)
+    except FileNotFoundError as e:
+        print(e)
         sys.exit(1)
-
-    total_sections = 0
-    total_questions = 0
-
-    for filepath in md_files:
-        filename = os.path.basename(filepath)
-        print(f'\nParsing {filename}...')
-
-        module = parse_module_file(filepath)
-        save_module(module)
-
-        questions = extract_questions(module)
-        save_questions(module.id, questions)
-
-        n_sections = len(module.sections)
-        n_questions = len(questions)
-        total_sections += n_sections
-        total_questions += n_questions
-
-        print(f'  Module {module.number:02d}: "{module.title}"')
-        print(f'  Sections: {n_sections}')
-        print(f'  Questions extracted: {n_questions}')
-
-        # Show question type breakdown
-        type_counts = {}
-        for q in questions:
-            type_counts[q.question_type] = type_counts.get(q.question_type, 0) + 1
-        if type_counts:
-            types_str = ', '.join(f'{t}: {c}' for t, c in sorted(type_counts.items()))
-            print(f'  Types: {types_str}')
-
-    print(f'\n{"="*50}')
-    print(f'Total: {len(md_files)} modules, {total_sections} sections, {total_questions} questions')
     print('Done!')
 
+    if not args.watch:
+        return
+    watcher = SourceWatcher()
+    print(f'\nWatching modules/ for changes ({watcher.method}); Ctrl-C to stop')
+    try:
+        while True:
+            if watcher.wait(args.interval):
+                print(f'\n{"="*50}\nChange detected in modules/')
+                run_ingest(jobs=args.jobs)
+                print('Done!')
+    except KeyboardInterrupt:
+        pass
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Load-test the app with simulated study sessions.
+
+Each virtual user loops over one session until the run ends:
+
+  dashboard -> module overview -> 2-4 section views
+  -> /quiz/next, then /quiz/submit + /quiz/grade for each question
+  -> /review -> 1-3 /practice/sql-run submissions (right or wrong)
+
+By default the app runs in-process behind the Flask test client, one
+client per user thread, with progress written to a temporary file instead
+of data/progress.json. Threads share one interpreter, so this finds races
+and lock contention rather than throughput limits; for those, point --url
+at a running server (e.g. gunicorn with several workers), which is driven
+over real HTTP and records progress in its own data/.
+
+--users takes a comma-separated list to step up concurrency; each step runs
+for --duration seconds and reports p50/p95/p99 latency and errors per route.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage.module_store import list_modules
+from app.storage.challenge_store import load_all_challenges
+from bench_ingest import git_revision
+
+import argparse
+import http.cookiejar
+import json
+import platform
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+QUIZ_TOKEN_RE = re.compile(r'name="quiz_token" value="([^"]+)"')
+GRADES = ['correct', 'correct', 'partial', 'incorrect']
+WRONG_SQL = 'SELECT 1 AS nope'
+ERROR_SAMPLES = 3  # error messages kept per route
+
+
+class ClientTransport:
+    """In-process requests through the Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None):
+        r = self.client.open(path, method=method, data=data, json=json_body)
+        return r.status_code, r.get_data(as_text=True)
+
+
+class HttpTransport:
+    """Real HTTP against a running server, one cookie jar per user."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data, doseq=True).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as r:
+                return r.status, r.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+
+
+class Stats:
+    """Latencies and errors per route, shared by all user threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}  # route -> [seconds]
+        self.errors = {}  # route -> count
+        self.samples = {}  # route -> [message]
+        self.sessions = 0
+
+    def record(self, route, seconds, error=None):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if error:
+                self.errors[route] = self.errors.get(route, 0) + 1
+                samples = self.samples.setdefault(route, [])
+                if len(samples) < ERROR_SAMPLES:
+                    samples.append(error)
+
+
+class User:
+    def __init__(self, transport, stats, content, rng, think):
+        self.transport = transport
+        self.stats = stats
+        self.modules, self.challenges = content
+        self.rng = rng
+        self.think = think
+
+    def call(self, route, method, path, expect=(200,), **kwargs):
+        """Make one request, timing it under route; returns the body or None."""
+        start = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, **kwargs)
+        except Exception as e:
+            self.stats.record(route, time.perf_counter() - start, f'{e.__class__.__name__}: {e}')
+            return None
+        error = None if status in expect else f'HTTP {status}'
+        self.stats.record(route, time.perf_counter() - start, error)
+        if self.think:
+            time.sleep(self.rng.uniform(0, self.think))
+        return None if error else body
+
+    def session(self):
+        module_id, n_sections = self.rng.choice(self.modules)
+        self.call('GET /', 'GET', '/')
+        self.call('GET /module/<id>', 'GET', f'/module/{module_id}')
+        for idx in sorted(self.rng.sample(range(n_sections), min(n_sections, self.rng.randint(2, 4)))):
+            self.call('GET /module/<id>/section/<n>', 'GET', f'/module/{module_id}/section/{idx}')
+        self.quiz(module_id)
+        self.call('GET /review', 'GET', '/review')
+        for _ in range(self.rng.randint(1, 3)):
+            self.sql_run()
+
+    def quiz(self, module_id):
+        body = self.call('POST /quiz/next', 'POST', '/quiz/next',
+                         data={'module_id': module_id, 'count': self.rng.randint(3, 8)})
+        idx = 0
+        while body:
+            match = QUIZ_TOKEN_RE.search(body)
+            if not match:
+                return  # completion card
+            token = match.group(1)
+            self.call('POST /quiz/submit', 'POST', '/quiz/submit',
+                      data={'quiz_token': token, 'current_idx': idx, 'user_answer': 'load test'})
+            body = self.call('POST /quiz/grade', 'POST', '/quiz/grade',
+                             data={'quiz_token': token, 'current_idx': idx,
+                                   'grade': self.rng.choice(GRADES)})
+            idx += 1
+
+    def sql_run(self):
+        if not self.challenges:
+            return
+        challenge = self.rng.choice(self.challenges)
+        sql = challenge.get('sql_answer') if self.rng.random() < 0.5 else WRONG_SQL
+        self.call('POST /practice/sql-run', 'POST', '/practice/sql-run',
+                  json_body={'challenge_id': challenge['id'], 'sql': sql or WRONG_SQL})
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_step(make_transport, content, users, duration, seed, think):
+    stats = Stats()
+    deadline = time.monotonic() + duration
+
+    def worker(i):
+        user = User(make_transport(), stats, content, random.Random(seed * 1000 + i), think)
+        while time.monotonic() < deadline:
+            user.session()
+            with stats.lock:
+                stats.sessions += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    for route, values in stats.latencies.items():
+        values.sort()
+        routes[route] = {
+            'requests': len(values),
+            'errors': stats.errors.get(route, 0),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000,
+            'error_samples': stats.samples.get(route, []),
+        }
+    total = sum(r['requests'] for r in routes.values())
+    return {
+        'users': users,
+        'seconds': elapsed,
+        'sessions': stats.sessions,
+        'requests': total,
+        'errors': sum(r['errors'] for r in routes.values()),
+        'requests_per_sec': total / elapsed if elapsed else 0.0,
+        'routes': routes,
+    }
+
+
+def print_step(step):
+    print(f'\n{step["users"]} users: {step["sessions"]} sessions, {step["requests"]} requests, '
+          f'{step["errors"]} errors in {step["seconds"]:.1f}s ({step["requests_per_sec"]:.0f} req/s)')
+    print(f'{"route":<32} {"reqs":>6} {"errs":>5} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+    for route, r in sorted(step['routes'].items()):
+        print(f'{route:<32} {r["requests"]:>6} {r["errors"]:>5} {r["p50_ms"]:>8.1f} '
+              f'{r["p95_ms"]:>8.1f} {r["p99_ms"]:>8.1f} {r["max_ms"]:>8.1f}')
+        for sample in r['error_samples']:
+            print(f'    ! {sample}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', default='4', help='concurrent users, or a list to step through, e.g. 1,4,16')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per step (default: 10)')
+    parser.add_argument('--url', help='drive a running server at this base URL instead of the app in-process')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout with --url (default: 30)')
+    parser.add_argument('--think', type=float, default=0.0, help='max random pause between requests, seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='PATH', help='also write results as JSON')
+    args = parser.parse_args(argv)
+
+    steps = [int(n) for n in args.users.split(',')]
+    modules = [(m.id, len(m.sections)) for m in list_modules() if m.sections]
+    challenges = load_all_challenges()
+    if not modules:
+        parser.error('no modules in data/; run scripts/ingest_all.py first')
+    content = (modules, challenges)
+
+    work = None
+    if args.url:
+        def make_transport():
+            return HttpTransport(args.url, args.timeout)
+    else:
+        from app import create_app
+        from app.storage import progress_store
+        # Keep simulated grades out of data/progress.json
+        work = tempfile.mkdtemp(prefix='load-test-')
+        progress_store.PROGRESS_FILE = os.path.join(work, 'progress.json')
+        app = create_app()
+
+        def make_transport():
+            return ClientTransport(app)
+
+    results = []
+    try:
+        for users in steps:
+            step = run_step(make_transport, content, users, args.duration, args.seed, args.think)
+            print_step(step)
+            results.append(step)
+    finally:
+        if work:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if args.json:
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'target': args.url or 'in-process',
+            'duration': args.duration,
+            'seed': args.seed,
+            'steps': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f'\nWrote {args.json}')
+
+
+if __name__ == '__main__':
+    main()
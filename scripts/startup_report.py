@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Report where cold-start time goes and check it against a budget.
+
+Runs `python -X importtime` in fresh interpreters that import the app and
+call create_app(), then prints:
+
+  - wall time of the imports and of create_app() (which includes cache
+    warm-up unless --no-warm), median over --runs processes
+  - the slowest imports by cumulative time, app modules marked with *
+
+With --budget MS it exits 1 if the median import + create_app time is over
+budget, so it can gate CI or a deploy script.
+"""
+
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+
+# Runs in the child; reports its timings as JSON on the last stdout line
+CHILD = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "create_app_ms": (done - imported) * 1000}))
+'''
+
+
+def run_child(importtime, warm):
+    env = dict(os.environ, WARM_CACHES='1' if warm else '0')
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD]
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f'create_app failed:\n{proc.stderr}')
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    return timings, proc.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative), depth))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='processes to time (default: 5)')
+    parser.add_argument('--top', type=int, default=20, help='slowest imports to list (default: 20)')
+    parser.add_argument('--no-warm', action='store_true', help='run with WARM_CACHES=0')
+    parser.add_argument('--budget', type=float, metavar='MS',
+                        help='fail if median import + create_app exceeds this many ms')
+    args = parser.parse_args(argv)
+    warm = not args.no_warm
+
+    # Timed runs without -X importtime, which slows imports down
+    runs = [run_child(False, warm)[0] for _ in range(args.runs)]
+    import_ms = statistics.median(r['import_ms'] for r in runs)
+    create_ms = statistics.median(r['create_app_ms'] for r in runs)
+    total_ms = statistics.median(r['import_ms'] + r['create_app_ms'] for r in runs)
+
+    _, stderr = run_child(True, warm)
+    rows = parse_importtime(stderr)
+    top_level = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+    app_self = sum(self_us for name, self_us, _, _ in rows if name == 'app' or name.startswith('app.')) / 1000
+
+    print(f'median of {args.runs} runs (cache warm-up {"on" if warm else "off"}):')
+    print(f'  import app      {import_ms:8.1f} ms')
+    print(f'  create_app()    {create_ms:8.1f} ms')
+    print(f'  total           {total_ms:8.1f} ms')
+    print(f'\n-X importtime: {top_level:.1f} ms in imports, {app_self:.1f} ms of it in app modules themselves')
+    print(f'{"cumulative ms":>14} {"self ms":>8}  module')
+    for name, self_us, cumulative, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        mark = '*' if name == 'app' or name.startswith('app.') else ' '
+        print(f'{cumulative / 1000:>14.1f} {self_us / 1000:>8.1f} {mark}{"  " * depth}{name}')
+
+    if args.budget is not None:
+        if total_ms > args.budget:
+            print(f'\nOVER BUDGET: {total_ms:.1f} ms > {args.budget:.0f} ms')
+            return 1
+        print(f'\nwithin budget: {total_ms:.1f} ms <= {args.budget:.0f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
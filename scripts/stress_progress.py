@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Hammer the progress store from many threads and check nothing is lost.
+
+--threads graders each record --grades attempts through updating() (which
+writes progress out after every grade), with extra flush() calls mixed in,
+while as many reader threads summarize it inside locked(). Afterwards:
+
+  - no thread raised (e.g. "dictionary changed size during iteration")
+  - the progress file parses and, reloaded, holds exactly one attempt per grade
+  - the incrementally kept module/category counters match rebuild_stats()
+
+Progress is written to a temporary directory, never to data/. Exits 1 on
+any failure.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage import progress_store
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+GRADES = ['correct', 'partial', 'incorrect']
+MODULES = 20
+CATEGORIES = ['sql', 'python', 'statistics', 'ml']
+
+
+def grader(i, args, errors):
+    rng = random.Random(args.seed * 1000 + i)
+    try:
+        for n in range(args.grades):
+            with progress_store.updating() as p:
+                p.record_attempt(f'q{rng.randrange(args.questions)}', rng.choice(GRADES),
+                                 f'module-{rng.randrange(MODULES):02d}', rng.choice(CATEGORIES))
+                p.update_streak()
+            if n % 25 == 0:
+                progress_store.flush()
+    except Exception as e:
+        errors.append(f'grader {i}: {e.__class__.__name__}: {e}')
+
+
+def reader(i, done, errors):
+    try:
+        while not done.is_set():
+            with progress_store.locked() as p:
+                p.module_summaries()
+                p.category_summaries()
+                p.due_count()
+            time.sleep(0.001)  # leave the graders a gap, as requests would
+    except Exception as e:
+        errors.append(f'reader {i}: {e.__class__.__name__}: {e}')
+
+
+def counts(stats: dict) -> dict:
+    return {key: vars(c) for key, c in stats.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='grader threads, and as many readers (default: 8)')
+    parser.add_argument('--grades', type=int, default=100, help='grades per thread (default: 100)')
+    parser.add_argument('--questions', type=int, default=2000, help='distinct question ids (default: 2000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix='stress-progress-')
+    progress_store.PROGRESS_FILE = os.path.join(work, 'progress.json')
+    errors = []
+    done = threading.Event()
+    try:
+        start = time.perf_counter()
+        graders = [threading.Thread(target=grader, args=(i, args, errors)) for i in range(args.threads)]
+        readers = [threading.Thread(target=reader, args=(i, done, errors)) for i in range(args.threads)]
+        for t in graders + readers:
+            t.start()
+        for t in graders:
+            t.join()
+        done.set()
+        for t in readers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        expected = args.threads * args.grades
+        print(f'{expected} grades from {args.threads} threads in {elapsed:.2f}s '
+              f'({expected / elapsed:.0f}/s, each written out)')
+
+        live = progress_store.get_progress()
+        module_stats, category_stats = counts(live.module_stats), counts(live.category_stats)
+        live.rebuild_stats()
+        if (module_stats, category_stats) != (counts(live.module_stats), counts(live.category_stats)):
+            errors.append('incremental counters differ from rebuild_stats()')
+
+        with open(progress_store.PROGRESS_FILE, 'r', encoding='utf-8') as f:
+            json.load(f)
+        attempts = sum(qp.attempts for qp in progress_store.reload().questions.values())
+        if attempts != expected:
+            errors.append(f'{attempts} attempts on disk, expected {expected}')
+    except ValueError as e:
+        errors.append(f'progress file does not parse: {e}')
+    finally:
+        progress_store._progress = None
+        shutil.rmtree(work, ignore_errors=True)
+
+    for error in errors[:10]:
+        print(f'  ! {error}')
+    print('FAILED' if errors else 'OK')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())